@@ -7,52 +7,117 @@ Algorithme génétique pour résolution du problème du voyageur de commerce - P
 Résoud un PVC, soit à partir d'un fichier ou d'une interface graphique avec mise à jour visuelle ou non (gui)
 	Recherche un chemin optimisé entre N villes
 
+Population initiale:
+	Quelques chemins construits par heuristiques (glouton sur les arêtes, plus proche voisin), le reste aléatoire
+	Un index spatial (grille uniforme) accélère ces constructions et les recherches de plus proches voisins
+
 Fonction de fitness/évaluation: 
 	Distance totale du chemin de chaque solution
 	
 Sélection mise en place:
 	Elitisime: sélection de N meilleures solutions - 30% de la population
 	Roulette: sélection pour nouvelle population, donnant plus de probabilité de choix aux solutions courtes
+	Sélectionnables (--selection): tournoi et rang
 	
 Croisement:
-	Utilisé: Greedy Subtour Crossover (GSX), issu du document anglais donné en cours
-	Aussi développé initialement mais désactivé: OX, issu du document français donné en cours
+	Par défaut: Greedy Subtour Crossover (GSX), issu du document anglais donné en cours
+	Sélectionnables (--crossover): OX, issu du document français donné en cours, PMX et Edge Recombination (ERX)
 	Taux plutôt élevé
 	
 Mutation:
 	Echange aléatoire de deux villes dans le chemin
 	Taux faible
 
+Recherche locale (--local-search):
+	2-opt et Or-opt sur les meilleures solutions, limités aux plus proches voisins de chaque ville
+	Une part du temps de calcul lui est consacrée (25% par défaut)
+
+Evaluation:
+	Les fils d'une génération sont évalués ensemble (vectorisé avec numpy si disponible)
+
+Modèle en îles (--workers):
+	Plusieurs populations évoluent en parallèle dans des processus séparés
+	Les meilleures solutions migrent périodiquement d'une île à la suivante (anneau)
+
+Résolution par lots (ga_solve_batch, --batch):
+	De nombreuses petites instances (répertoire, flux JSONL ou tableaux) sont réparties sur un pool de processus
+	Les instances de quelques villes sont résolues exactement par énumération
+
 Réalisé avec python v3.3 et pygame v1.9.2a0
 
 @date: février 2015
 @author: vincent.deruaz, mathieu.rosser
 '''
 
+import os
+import json
 import math
 import time
+import traceback
+import struct
+import heapq
+import bisect
+import queue
 import random
+import threading
+import multiprocessing
 import pygame
+import asyncio
 import argparse
+from array import array
+from collections import Counter, deque, namedtuple
+from itertools import accumulate, chain, permutations
+from operator import itemgetter
 from pygame.locals import KEYDOWN, QUIT, MOUSEBUTTONDOWN, K_RETURN
 
-def ga_solve(file=None, gui=True, maxtime=0):
+try:
+	import numpy	# optionnel: évaluation vectorisée des distances
+except ImportError:
+	numpy = None
+
+# Etat de la résolution transmis pendant le calcul: meilleure distance, copie du meilleur chemin (indices),
+# nombre de générations, temps écoulé et fin du calcul
+Snapshot = namedtuple('Snapshot', ('distance', 'tour', 'generation', 'elapsed', 'ended'))
+
+# Résultat d'une instance résolue par lots: nom de l'instance, distance, villes dans l'ordre, temps de calcul, solution exacte
+BatchResult = namedtuple('BatchResult', ('name', 'distance', 'cities', 'time', 'exact'))
+
+# Nombre maximum de villes d'une instance résolue exactement par énumération ((N-1)!/2 chemins)
+EXACT_MAX_CITIES = 9
+
+
+def ga_solve(file=None, gui=True, maxtime=0, crossover='gsx', selection='roulette', force_crossover='reuse', workers=1,
+		eval_workers=0, local_search=0.25, patience=0, target=0, max_generations=0, profile=None, seed=None, config=None):
 	'''
 		Résolution d'un PVC
 		@param file: 	fichier de villes à charger
 		@param gui: 	affiche l'interface graphique
 		@param maxtime: temps maximum de calcul
+		@param crossover: opérateur de croisement (cf Solution.CROSSOVERS)
+		@param selection: méthode de sélection des parents (cf Population.SELECTIONS)
+		@param force_crossover: politique de croisement forcé (cf Population.FORCE_CROSSOVER)
+		@param workers:	nombre d'îles évoluant en parallèle (0: une par coeur)
+		@param eval_workers: nombre de processus d'évaluation des fils pour les grands problèmes (0: aucun)
+		@param local_search: part du temps de calcul consacrée à la recherche locale 2-opt/Or-opt (0: désactivée)
+		@param patience: arrêt après K générations sans amélioration (0: désactivé)
+		@param target:	arrêt dès que la distance cible est atteinte (0: désactivé)
+		@param max_generations: arrêt après N générations (0: désactivé)
+		@param profile: fichier où écrire la trace du profilage: temps par phase, compteurs (None: profilage désactivé)
+		@param seed:	graine du générateur aléatoire (None: graine système); une résolution limitée en générations, sans îles
+						et avec un budget fixe de recherche locale (cf Config.local_search_checks) est reproductible
+		@param config:	paramètres de l'algorithme propres à la résolution: taille de population, taux, modèle... (cf Config)
 		@return: 		la distance totale calculée, la liste des villes dans l'ordre de passage
 	'''
 	
-	# init villes
+	# init villes: tableaux de coordonnées du fichier, sans création d'objets City
 	if file is None:
 		cities = []
 	else:
-		cities = Parser(file).cities
+		cities = Parser(file)
 	
 	# objet de résolution PVC
-	pvc = PVC(cities, maxtime)
+	pvc = PVC(cities, maxtime, crossover, selection, force_crossover, workers, eval_workers, local_search,
+			patience, target, max_generations, profile is not None, seed, config)
 	
 	# affichage ou calcul
 	if gui:
@@ -60,405 +125,2561 @@ def ga_solve(file=None, gui=True, maxtime=0):
 	else:
 		pvc.compute()
 	
-	# résultats
-	cities_names = [c.name for c in pvc.ordered_cities]
+	if profile is not None:
+		pvc.profiler.write(profile, pvc.generations, pvc.total_time)
+	
+	# résultats: résolution des indices du chemin en noms de villes
+	cities_names = [pvc.names[i] for i in pvc.tour]
 	return pvc.total_distance, cities_names
 	
 
+def ga_solve_batch(instances, maxtime=0, processes=0, seed=None, config=None, chunksize=4, **options):
+	'''
+		Résolution d'un lot d'instances, réparties sur un pool de processus; générateur des résultats (BatchResult)
+		dans l'ordre de fin des calculs
+		@param instances: répertoire de fichiers de villes (.txt, .tsp), fichier JSONL, ou itérable d'instances:
+							dictionnaires JSONL, listes de City, couples (xs, ys) (cf _batch_instances)
+		@param maxtime:	temps maximum de calcul par instance (0: arrêt par stagnation)
+		@param processes: nombre de processus (0: un par coeur, 1: résolution dans le processus courant)
+		@param seed:	graine dont sont tirées les graines des instances, dans l'ordre du lot (None: graine système)
+		@param config:	paramètres de l'algorithme (cf Config)
+		@param chunksize: nombre d'instances envoyées ensemble à un processus
+		@param options:	autres paramètres de PVC (crossover, selection, local_search...)
+		Les instances de EXACT_MAX_CITIES villes au plus sont résolues exactement, sans algorithme génétique
+	'''
+	
+	rng = random.Random(seed)
+	jobs = ((name, cities, maxtime, rng.getrandbits(64), config, options) for name, cities in _batch_instances(instances))
+	
+	if processes == 1:
+		yield from map(_solve_instance, jobs)
+		return
+	
+	with multiprocessing.Pool(processes or None) as pool:
+		yield from pool.imap_unordered(_solve_instance, jobs, chunksize)
+
+def _batch_instances(instances):
+	''' 
+		instances d'un lot sous forme (nom, villes)
+		un répertoire donne ses fichiers de villes, dans l'ordre alphabétique
+		un dictionnaire (ligne JSONL) donne "cities": [[nom, x, y], ...] ou "xs", "ys" et éventuellement "names",
+		ainsi qu'un "name" optionnel; sans nom, une instance est désignée par son rang dans le lot
+	'''
+	
+	if isinstance(instances, str):
+		if os.path.isdir(instances):
+			for file in sorted(os.listdir(instances)):
+				path = os.path.join(instances, file)
+				
+				if not (file.endswith(('.txt', Parser.TSPLIB_SUFFIX)) and os.path.isfile(path)):
+					continue
+				
+				# les fichiers qui ne sont pas des listes de villes (résultats, notes) sont ignorés
+				try:
+					cities = Parser(path).cities
+				except ValueError:
+					continue
+				
+				yield path, cities
+			return
+		
+		with open(instances) as lines:
+			yield from _batch_instances(json.loads(line) for line in lines if line.strip())
+		return
+	
+	for i, instance in enumerate(instances):
+		name = str(i)
+		
+		if isinstance(instance, dict):
+			name = str(instance.get('name', name))
+			
+			if 'cities' in instance:
+				cities = [City(n, x, y) for n, x, y in instance['cities']]
+			else:
+				xs, ys = instance['xs'], instance['ys']
+				names = instance.get('names') or ["v%i" % k for k in range(len(xs))]
+				cities = [City(n, x, y) for n, x, y in zip(names, xs, ys)]
+		elif len(instance) == 2 and not isinstance(instance[0], City):
+			xs, ys = instance
+			cities = [City("v%i" % k, x, y) for k, (x, y) in enumerate(zip(xs, ys))]
+		else:
+			cities = list(instance)
+		
+		yield name, cities
+
+def _solve_instance(job):
+	''' résolution d'une instance d'un lot: exacte pour les petites instances, sinon par algorithme génétique '''
+	
+	name, cities, maxtime, seed, config, options = job
+	start = time.perf_counter()
+	
+	if len(cities) <= EXACT_MAX_CITIES:
+		distance, tour = exact_tour(cities)
+		exact = True
+	else:
+		pvc = PVC(cities, maxtime, seed=seed, config=config, **options)
+		pvc.compute()
+		distance, tour = pvc.total_distance, pvc.tour
+		exact = False
+	
+	return BatchResult(name, distance, [cities[i].name for i in tour], time.perf_counter() - start, exact)
+
+def exact_tour(cities):
+	''' 
+		plus court chemin par énumération de toutes les permutations, pour quelques villes seulement
+		la première ville est fixée et chaque cycle n'est parcouru que dans un sens: (N-1)!/2 chemins
+		@return: la distance et le chemin (indices des villes)
+	'''
+	
+	n = len(cities)
+	
+	if n < 4:
+		tour = list(range(n))
+		distances = DistanceMatrix([c.x for c in cities], [c.y for c in cities])
+		return (distances.tour_length(array('i', tour)) if n > 1 else 0), tour
+	
+	dist = [[math.hypot(a.x - b.x, a.y - b.y) for b in cities] for a in cities]
+	best, best_tour = None, None
+	
+	for p in permutations(range(1, n)):
+		if p[0] > p[-1]:
+			continue
+		
+		d = dist[0][p[0]] + dist[p[-1]][0] + sum([dist[a][b] for a, b in zip(p, p[1:])])
+		
+		if best is None or d < best:
+			best, best_tour = d, p
+	
+	return best, [0] + list(best_tour)
+
+
 class PVC():
 	''' 
 		Classe résolvant un PVC, à partir d'une liste de villes, dans un temps maximum ou jusqu'à stagnation 
-		Le temps maximum est géré par chronométrage des traitements
-		La stagnation est déterminée en stockant les N derniers meilleurs résultats (distances minimum)
-			et en calculant l'écart-type pour ces distances. On s'arrêt si l'écart-type est plus petit qu'un epsylon.
-		Résultats en sortie: total_distance, total_time, ordered_cities
+		Le temps maximum est géré par une échéance calculée au départ (horloge perf_counter)
+		La stagnation est déterminée sur une fenêtre glissante des N derniers meilleurs résultats (distances minimum):
+			on s'arrête si ces distances ne varient pas de plus d'un epsylon (cf StopCondition)
+			elle n'est évaluée que sans temps maximum
+		D'autres conditions d'arrêt sont possibles: pas d'amélioration depuis K générations, distance cible, nombre de générations
+		L'objet est réutilisable: un nouvel appel à compute reprend à partir de la population et des structures existantes
+			des villes peuvent être ajoutées ou retirées entre deux appels, les chemins étant réparés par insertion au moindre coût
+		La progression est accessible par un générateur (iterate) ou un générateur asynchrone (stream) d'états (Snapshot)
+			à une fréquence donnée; cancel() demande l'arrêt du calcul à la prochaine génération
+		Les chemins sont manipulés sous forme d'indices dans la table des villes (cities)
+		Après chaque génération, une part du temps (local_search) est consacrée à la recherche locale des meilleures solutions
+		Avec plusieurs workers, une population (île) évolue dans chaque processus, avec migration des élites en anneau
+			le calcul se termine au temps maximum, ou lorsque toutes les îles ont stagné
+		Résultats en sortie: total_distance, total_time, generations, stop_reason, stagnated, tour (indices), ordered_cities (villes)
+			avec profile, le temps par phase et les compteurs de la résolution sont disponibles (cf Profiler)
 	'''
 	
-	# Nombre d'évolutions de la population avant d'évaluer la condition de stagnation 
+	# Nombre d'évolutions de la population dans la fenêtre de la condition de stagnation (par défaut, cf Config)
 	STAGNATION_SIZE = 200
 	
-	# Epsylon de marge pour la condition de stagnation : si l'écart-type est <= EPSYLON, on a une stagnation
-	STD_EPSYLON = 1e-10
+	# Epsylon de marge pour la condition de stagnation : si les distances de la fenêtre varient de <= EPSYLON, on a une stagnation
+	STD_EPSYLON = 1e-10
+	
+	# Nombre de générations d'une île entre deux migrations
+	MIGRATION_INTERVAL = 50
+	
+	# Nombre de meilleures solutions envoyées à l'île suivante lors d'une migration
+	MIGRATION_SIZE = 2
+	
+	# Nombre de chemins construits par heuristiques dans la population initiale: un glouton, les autres plus proche voisin
+	INITIAL_TOURS = 4
+	
+	def __init__(self, cities, maxtime, crossover='gsx', selection='roulette', force_crossover='reuse', workers=1,
+			eval_workers=0, local_search=0.25, patience=0, target=0, max_generations=0, profile=False, seed=None, config=None):
+		''' 
+			initialise la résolution du PVC avec les villes à rejoindre
+			cities: liste de City, ou objet donnant les tableaux xs, ys et names (cf Parser): les objets City ne sont alors
+				créés qu'à la demande (attribut cities)
+			seed: graine du générateur aléatoire de la résolution (None: graine système, résultats non reproductibles)
+			config: paramètres de l'algorithme (cf Config, None: valeurs par défaut)
+		'''
+		
+		# vérifiés dès maintenant: avec plusieurs workers, la population n'est créée que dans les îles
+		Population.check_options(crossover, selection, force_crossover)
+		
+		# coordonnées et noms des villes, copiés: add_cities et remove_cities ne modifient pas les données de l'appelant
+		if hasattr(cities, 'xs'):
+			self._cities = None
+			self.names = list(cities.names)
+			self.xs = array('d', cities.xs)
+			self.ys = array('d', cities.ys)
+		else:
+			self._cities = list(cities)
+			self.names = [c.name for c in self._cities]
+			self.xs = array('d', [c.x for c in self._cities])
+			self.ys = array('d', [c.y for c in self._cities])
+		
+		self.maxtime = maxtime
+		self.crossover = crossover
+		self.selection = selection
+		self.force_crossover = force_crossover
+		self.workers = workers if workers > 0 else os.cpu_count()
+		self.eval_workers = eval_workers
+		self.local_search_rate = local_search
+		self.local_search_time = 0
+		self.profiler = Profiler() if profile else None	# instrumentation, None si désactivée
+		self.rng = random.Random(seed)	# générateur propre à la résolution
+		self.config = config if config is not None else Config()
+		
+		# conditions d'arrêt, la stagnation n'étant évaluée que sans temps maximum
+		self.patience = patience
+		self.target = target
+		self.max_generations = max_generations
+		
+		self.total_distance = 0
+		self.total_time = 0
+		self.generations = 0
+		self.stop_reason = None
+		self.stagnated = False
+		self.cancelled = False
+		self.tour = array('i', range(len(self.names)))	# meilleur chemin, indices dans cities
+		
+		# structures gardées entre deux résolutions (démarrage à chaud)
+		self.distances = None
+		self.population = None
+		self.solved = False
+	
+	@property
+	def cities(self):
+		''' table des villes (objets City), créée à la première demande si les villes ont été données par leurs coordonnées '''
+		
+		if self._cities is None:
+			self._cities = _make_cities(self.names, self.xs, self.ys)
+			
+		return self._cities
+	
+	@property
+	def ordered_cities(self):
+		''' villes dans l'ordre du meilleur chemin '''
+		return [self.cities[i] for i in self.tour]
+	
+	def add_city(self, city):
+		''' ajoute une ville à la table des villes et en fin de chemin (ou au moindre coût après une résolution) '''
+		self.add_cities([city])
+	
+	def add_cities(self, cities):
+		''' 
+			Ajoute des villes à la table des villes
+			Avant la première résolution, elles sont simplement ajoutées en fin de chemin
+			Ensuite, la matrice de distances est étendue, les index reconstruits et chaque chemin (population, chemins initiaux,
+				meilleur chemin) est réparé en insérant les villes au moindre coût, près de leurs plus proches voisins
+		'''
+		
+		cities = list(cities)
+		first = len(self.names)
+		
+		# table des villes créée si besoin: remove_cities reconnaît les villes ajoutées par leur identité
+		self.cities.extend(cities)
+		
+		for c in cities:
+			self.names.append(c.name)
+			self.xs.append(c.x)
+			self.ys.append(c.y)
+		
+		if self.distances is None:
+			self.tour.extend(range(first, len(self.names)))
+			return
+		
+		for c in cities:
+			self.distances.add(c.x, c.y)
+		
+		self.update_indexes()
+		
+		# insertion des nouvelles villes une à une, les voisins candidats devant déjà être dans les chemins
+		for city in range(first, len(self.names)):
+			candidates = [j for j in self.grid.knn(city, LocalSearch.NEIGHBORS) if j < city]
+			
+			for tour in self.initial_tours:
+				cheapest_insertion(tour, city, self.distances, candidates)
+			
+			if self.population is not None:
+				for s in self.population.solutions:
+					s._distance = s.distance() + cheapest_insertion(s.tour, city, self.distances, candidates)
+					s.local_optimum = False
+			else:
+				self.total_distance += cheapest_insertion(self.tour, city, self.distances, candidates)
+		
+		self.update_best()
+	
+	def remove_cities(self, cities):
+		''' 
+			Retire des villes (objets City de la table des villes)
+			Les indices des villes restantes sont compactés, la matrice de distances et les index mis à jour
+			et les villes retirées sont supprimées de tous les chemins
+		'''
+		
+		removed = {id(c) for c in cities}
+		keep = [i for i, c in enumerate(self.cities) if id(c) not in removed]
+		
+		mapping = array('i', [-1]) * len(self.names)	# ancien indice -> nouvel indice (-1: retirée)
+		for new, old in enumerate(keep):
+			mapping[old] = new
+		
+		def remap(tour):
+			tour[:] = array('i', [mapping[c] for c in tour if mapping[c] >= 0])
+		
+		self._cities = [self._cities[i] for i in keep]
+		self.names = [self.names[i] for i in keep]
+		self.xs = array('d', [self.xs[i] for i in keep])
+		self.ys = array('d', [self.ys[i] for i in keep])
+		
+		if self.distances is None:
+			remap(self.tour)
+			return
+		
+		self.distances.remove(keep)
+		self.update_indexes()
+		
+		for tour in self.initial_tours:
+			remap(tour)
+		
+		if self.population is not None:
+			for s in self.population.solutions:
+				remap(s.tour)
+				s._distance = None
+				s.local_optimum = False
+			self.evaluator.evaluate(self.population.solutions)
+		else:
+			remap(self.tour)
+			self.total_distance = self.distances.tour_length(self.tour) if self.tour else 0
+			
+		self.update_best()
+	
+	def update_indexes(self):
+		''' reconstruit l'index spatial, les voisins de la recherche locale et l'évaluateur après un changement de villes '''
+		
+		self.grid = SpatialGrid(self.distances.xs, self.distances.ys)
+		
+		if self.local_search is not None:
+			self.local_search = LocalSearch(self.distances, self.grid)
+		
+		self.evaluator = BatchEvaluator(self.distances, profiler=self.profiler)
+		
+		if self.population is not None:
+			self.population.evaluator = self.evaluator
+	
+	def update_best(self):
+		''' reprend le meilleur chemin de la population après une modification des villes '''
+		
+		if self.population is not None:
+			self.population.order_by_distance_and_shrink()
+			self.tour = self.population.solutions[0].tour
+			self.total_distance = self.population.solutions[0].distance()
+		
+	def compute(self):	
+		''' 
+			Résoud un PVC à partir des données courantes : génération population, évolution, gestion de l'arrêt 
+			Lors d'un nouvel appel, la résolution reprend avec la population et les structures existantes
+			L'affichage de la progression est géré par la GUI elle-même (cf Gui.solve, à partir d'iterate)
+		'''
+		
+		for _ in self.iterate(None):
+			pass
+	
+	def iterate(self, interval=0):
+		''' 
+			Générateur résolvant le PVC et donnant l'état courant (Snapshot) au plus toutes les interval secondes
+			(0: à chaque génération, None: uniquement à la fin); le dernier état, à la fin du calcul, est toujours donné
+			L'arrêt peut être demandé par cancel() ou en fermant le générateur
+		'''
+		
+		self.start_clock()
+		self.generations = 0
+		self.cancelled = False
+		
+		# aucune ville (p.ex. GUI lancée sans clic): rien à résoudre, les structures ne sont pas construites
+		if not self.names:
+			self.total_distance = 0
+			self.stop_reason = 'empty'
+			yield self.snapshot()
+			return
+		
+		if self.distances is None:
+			self.prepare()
+		
+		if self.workers > 1:
+			# les îles étant déjà des processus, elles n'utilisent pas de pool d'évaluation
+			self.evaluator = BatchEvaluator(self.distances, profiler=self.profiler)
+			yield from self.iterate_islands(interval)
+			self.solved = True
+			return
+		
+		self.evaluator = BatchEvaluator(self.distances, self.eval_workers, self.profiler)
+		
+		try:
+			if self.population is None:
+				self.population = self.create_population()
+			else:
+				self.population.evaluator = self.evaluator
+			
+			last = self.start
+	
+			# évolution de la population jusqu'à la fin
+			while not self.is_ended():
+				self.evolve()
+				
+				if interval is not None and self.start + self.total_time - last >= interval:
+					last = self.start + self.total_time
+					yield self.snapshot()
+		finally:
+			self.evaluator.close()
+			self.solved = True
+			
+		yield self.snapshot()
+	
+	async def stream(self, interval=0.1):
+		''' 
+			Générateur asynchrone des états de la résolution (cf iterate), le calcul tournant dans un thread séparé
+			Le thread ne fait que déposer le dernier état: un lecteur lent reçoit moins d'états mais ne ralentit pas le calcul
+			(le dernier état, à la fin du calcul, est toujours transmis)
+			Quitter la boucle de lecture (ou annuler la tâche) demande l'arrêt du calcul
+		'''
+		
+		loop = asyncio.get_running_loop()
+		ready = asyncio.Event()
+		latest = []		# dernier état non lu (au plus un)
+		outcome = {}	# fin du calcul: 'done', et 'error' en cas d'exception
+		
+		def publish(snapshot):
+			latest[:] = [snapshot]
+			ready.set()
+		
+		def finish(error):
+			outcome['done'] = True
+			outcome['error'] = error
+			ready.set()
+		
+		def notify(callback, value):
+			try:
+				loop.call_soon_threadsafe(callback, value)
+			except RuntimeError:
+				pass	# boucle fermée: plus de lecteur
+		
+		def run():
+			error = None
+			try:
+				for snapshot in self.iterate(interval):
+					notify(publish, snapshot)
+			except BaseException as e:
+				error = e
+			finally:
+				notify(finish, error)
+		
+		solver = threading.Thread(target=run, daemon=True)
+		solver.start()
+		
+		try:
+			while True:
+				if latest:
+					yield latest.pop()
+				elif 'done' in outcome:
+					if outcome['error'] is not None:
+						raise outcome['error']
+					return
+				else:
+					await ready.wait()
+					ready.clear()
+		finally:
+			self.cancel()
+			await loop.run_in_executor(None, solver.join)
+	
+	def cancel(self):
+		''' demande l'arrêt du calcul, effectif à la fin de la génération en cours '''
+		self.cancelled = True
+	
+	@property
+	def profile(self):
+		''' résumé du profilage: temps par phase, compteurs, générations par seconde (None si désactivé) '''
+		
+		if self.profiler is None:
+			return None
+		
+		return self.profiler.summary(self.generations, self.total_time)
+	
+	def snapshot(self):
+		''' état courant de la résolution '''
+		return Snapshot(self.total_distance, array('i', self.tour), self.generations, self.total_time, self.stop_reason is not None)
+	
+	def prepare(self):
+		''' construit les structures gardées entre deux résolutions (partagées par les îles) '''
+		
+		# matrice des distances construite une seule fois
+		self.distances = distance_matrix(self.xs, self.ys)
+		
+		# index spatial et chemins initiaux construits par heuristiques
+		self.grid = SpatialGrid(self.distances.xs, self.distances.ys)
+		self.initial_tours = self.construct_tours()
+		
+		# listes de voisins de la recherche locale
+		self.local_search = LocalSearch(self.distances, self.grid) if self.local_search_rate > 0 else None
+	
+	def start_clock(self):
+		''' démarre le chronométrage, fixe l'échéance du temps maximum et initialise les conditions d'arrêt '''
+		
+		# une résolution précédente ne doit pas arrêter la suivante
+		self.stop_reason = None
+		self.stagnated = False
+		
+		self.start = time.perf_counter()
+		self.deadline = self.start + self.maxtime if self.maxtime else None
+		
+		window = 0 if self.maxtime else self.config.stagnation_size
+		self.stop_condition = StopCondition(window, PVC.STD_EPSYLON, self.patience, self.target, self.max_generations)
+		
+	def construct_tours(self):
+		''' construit les chemins initiaux: glouton sur les arêtes puis plus proche voisin depuis des villes au hasard '''
+		
+		n = len(self.names)
+		
+		if n < 3:
+			return []
+		
+		tours = [self.grid.greedy_tour()]
+		
+		for start in self.rng.sample(range(n), min(PVC.INITIAL_TOURS - 1, n)):
+			tours.append(self.grid.nearest_neighbor_tour(start))
+			
+		return tours
+	
+	def create_population(self):
+		''' 
+			création de la population initiale à partir du chemin courant et des chemins construits
+			après une première résolution (îles), le meilleur chemin trouvé fait aussi partie des chemins initiaux
+		'''
+		
+		initial_tours = self.initial_tours + [self.tour] if self.solved else self.initial_tours
+		
+		return Population(self.tour, self.distances, self.crossover, self.selection, self.force_crossover, self.evaluator,
+				initial_tours, self.profiler, self.rng, self.config)
+	
+	def evolve(self):
+		''' effectue une génération de la population et récupère les résultats courants '''
+		
+		# sélection, croisement et mutation de la population
+		self.population.update()
+		self.generations += 1
+		
+		# recherche locale dans la limite de la part de temps allouée,
+		# ou d'un nombre fixe de villes examinées par génération (indépendant de la machine, cf Config)
+		if self.local_search is not None:
+			now = time.perf_counter()
+			checks = int(self.config.local_search_checks * len(self.names))
+			budget = self.local_search_rate * (now - self.start) - self.local_search_time
+			
+			if checks > 0 or budget > 0:
+				if checks > 0:
+					self.population.improve(self.local_search, self.deadline, checks)
+				else:
+					self.population.improve(self.local_search, now + budget)
+				
+				self.local_search_time += time.perf_counter() - now
+				
+				if self.profiler:
+					self.profiler.lap('local_search', now)
+		
+		# récupération des résultats courants
+		self.tour = self.population.solutions[0].tour
+		self.total_distance = self.population.solutions[0].distance()
+		
+		if self.profiler:
+			self.profiler.improved(time.perf_counter() - self.start, self.generations, self.total_distance)
+		
+		# pour condition de fin
+		self.stop_reason = self.stop_condition.update(self.total_distance)
+		self.stagnated = self.stop_reason == 'stagnation'
+	
+	def iterate_islands(self, interval=0):
+		''' 
+			Résolution en îles: une population par processus, migration des élites de chaque île vers la suivante
+			Le processus principal relaie les migrants, garde le meilleur chemin et cumule les générations
+			Générateur des états de la résolution, comme iterate
+		'''
+		
+		results = multiprocessing.Queue()
+		inboxes = [multiprocessing.Queue() for _ in range(self.workers)]
+		stop = multiprocessing.Event()
+		
+		# graines indépendantes des îles, tirées du générateur de la résolution
+		seeds = [self.rng.getrandbits(64) for _ in range(self.workers)]
+		
+		islands = [multiprocessing.Process(target=_island, args=(self, i, inboxes[i], results, stop, seeds[i]), daemon=True)
+				for i in range(self.workers)]
+		
+		for p in islands:
+			p.start()
+		
+		generations = [0] * self.workers
+		stagnated = [False] * self.workers
+		finished = [False] * self.workers
+		suspects = set()	# îles terminées sans message final, déclarées en échec si aucun message n'arrive ensuite
+		errors = []
+		running = self.workers
+		best = None
+		last = self.start
+		
+		while running:
+			# arrêt de toutes les îles au temps maximum ou sur demande, même si une île est en retard
+			if not stop.is_set() and self.is_ended():
+				stop.set()
+			
+			try:
+				ended, index, island_generations, distance, tours, island_stagnated, stats, error = results.get(timeout=0.1)
+			except queue.Empty:
+				# île morte sans avoir envoyé son message final (processus tué...)
+				for i, p in enumerate(islands):
+					if finished[i] or p.exitcode is None:
+						continue
+					
+					if i in suspects:
+						finished[i] = True
+						running -= 1
+						errors.append("Ile %d: arrêt inattendu du processus (code %s)" % (i, p.exitcode))
+						stop.set()
+					else:
+						suspects.add(i)
+				continue
+			
+			if error is not None:
+				finished[index] = True
+				running -= 1
+				errors.append("Ile %d:\n%s" % (index, error))
+				stop.set()
+				continue
+			
+			generations[index] = island_generations
+			stagnated[index] = island_stagnated
+			
+			# une île arrêtée avant sa première génération ne remplace pas le résultat d'une île ayant évolué
+			if best is None or (island_generations > 0 and distance < best):
+				best = distance
+				self.tour = tours[0]
+				self.total_distance = distance
+				
+				if self.profiler:
+					self.profiler.improved(time.perf_counter() - self.start, sum(generations), distance)
+				
+				# distance cible atteinte par une île: arrêt de toutes les îles
+				if self.target and distance <= self.target:
+					self.stop_reason = 'target'
+					stop.set()
+			
+			if ended:
+				finished[index] = True
+				running -= 1
+				
+				if self.profiler:
+					self.profiler.merge(stats)
+			elif not finished[(index + 1) % self.workers]:
+				# migration vers l'île suivante de l'anneau, si elle évolue encore (personne ne lit la boîte d'une île terminée)
+				inboxes[(index + 1) % self.workers].put(tours)
+			
+			self.generations = sum(generations)
+			self.total_time = time.perf_counter() - self.start
+			
+			if interval is not None and self.start + self.total_time - last >= interval and running:
+				last = self.start + self.total_time
+				yield self.snapshot()
+		
+		# migrants non lus: le processus principal ne doit pas attendre leur envoi pour se terminer
+		for inbox in inboxes:
+			inbox.cancel_join_thread()
+			inbox.close()
+		
+		for p in islands:
+			p.join()
+		
+		if errors:
+			raise RuntimeError("Echec de la résolution en îles\n" + "\n".join(errors))
+		
+		self.stagnated = all(stagnated)
+		
+		if self.stagnated:
+			self.stop_reason = 'stagnation'
+		elif self.stop_reason is None:
+			self.stop_reason = 'islands'
+			
+		yield self.snapshot()
+					
+	def is_ended(self):
+		''' vérifie si le calcul est terminé par temps ou par une des conditions d'arrêt '''
+		
+		now = time.perf_counter()
+		self.total_time = now - self.start
+		
+		# arrêt selon temps
+		if self.deadline is not None and now >= self.deadline:
+			self.stop_reason = 'time'
+			return True
+		
+		# arrêt demandé
+		if self.cancelled:
+			self.stop_reason = 'cancelled'
+			return True
+		
+		return self.stop_reason is not None
+
+
+class StopCondition():
+	'''
+		Conditions d'arrêt évaluées en O(1) à chaque génération, à partir de la meilleure distance courante
+			stagnation: sur une fenêtre glissante des N dernières meilleures distances, l'écart entre la plus grande
+				et la plus petite est <= epsylon (l'écart-type est toujours inférieur à cet écart)
+				le minimum et le maximum de la fenêtre sont tenus par des files monotones, sans recalcul
+			patience: aucune amélioration (de plus d'epsylon) depuis K générations
+			target: distance cible atteinte
+			generations: nombre maximum de générations atteint
+		Une valeur nulle désactive la condition correspondante
+	'''
+	
+	def __init__(self, window=0, epsylon=0.0, patience=0, target=0, generations=0):
+		''' initialise les conditions d'arrêt '''
+		
+		self.window = window
+		self.epsylon = epsylon
+		self.patience = patience
+		self.target = target
+		self.generations = generations
+		
+		self.generation = 0
+		self.best = None
+		self.best_generation = 0
+		
+		# files monotones (génération, distance) du minimum et du maximum de la fenêtre
+		self._min = deque()
+		self._max = deque()
+		
+	def update(self, distance):
+		''' prend en compte la meilleure distance d'une nouvelle génération, retourne la raison de l'arrêt ou None '''
+		
+		self.generation += 1
+		g = self.generation
+		
+		if self.best is None or distance < self.best - self.epsylon:
+			self.best = distance
+			self.best_generation = g
+		
+		if self.target and distance <= self.target:
+			return 'target'
+		
+		if self.generations and g >= self.generations:
+			return 'generations'
+		
+		if self.patience and g - self.best_generation >= self.patience:
+			return 'patience'
+		
+		if self.window:
+			low, high = self._min, self._max
+			
+			while low and low[-1][1] >= distance:
+				low.pop()
+			low.append((g, distance))
+			
+			while high and high[-1][1] <= distance:
+				high.pop()
+			high.append((g, distance))
+			
+			# retrait des distances sorties de la fenêtre
+			if low[0][0] <= g - self.window:
+				low.popleft()
+			if high[0][0] <= g - self.window:
+				high.popleft()
+			
+			if g >= self.window and high[0][1] - low[0][1] <= self.epsylon:
+				return 'stagnation'
+			
+		return None
+
+
+class Profiler():
+	'''
+		Instrumentation de la résolution: temps cumulé par phase d'une génération et compteurs
+			phases: selection, crossover, evaluation, mutation, sort, local_search, migration
+			compteurs: crossovers (appels), swap_tries (échanges essayés par la mutation), evaluations (distances calculées),
+				distance_hits (distances stockées réutilisées), migrants
+		Les mesures sont faites par génération et les compteurs ajoutés par lots: sans profiler (None),
+			le coût se limite à quelques tests par génération
+		La trace garde (temps, génération, distance) à chaque amélioration du meilleur chemin
+	'''
+	
+	def __init__(self):
+		''' initialise des mesures vides '''
+		
+		self.timers = Counter()
+		self.counters = Counter()
+		self.trace = []
+	
+	def lap(self, phase, start):
+		''' ajoute le temps écoulé depuis start à la phase et retourne l'instant courant '''
+		
+		now = time.perf_counter()
+		self.timers[phase] += now - start
+		
+		return now
+	
+	def count(self, name, n=1):
+		''' incrémente un compteur '''
+		self.counters[name] += n
+	
+	def improved(self, elapsed, generation, distance):
+		''' note la meilleure distance courante dans la trace si elle est améliorée '''
+		
+		if not self.trace or distance < self.trace[-1][2]:
+			self.trace.append((elapsed, generation, distance))
+	
+	def stats(self):
+		''' mesures brutes, transmissibles entre processus '''
+		return dict(self.timers), dict(self.counters)
+	
+	def merge(self, stats):
+		''' cumule les mesures d'un autre profiler (île) '''
+		
+		timers, counters = stats
+		self.timers.update(timers)
+		self.counters.update(counters)
+	
+	def summary(self, generations, total_time):
+		''' résumé des mesures pour une résolution de generations générations en total_time secondes '''
+		
+		return {
+			'generations': generations,
+			'total_time': total_time,
+			'generations_per_second': generations / total_time if total_time > 0 else 0.0,
+			'timers': dict(self.timers),
+			'counters': dict(self.counters),
+			'trace': self.trace,
+		}
+	
+	def write(self, path, generations, total_time):
+		''' écrit le résumé et la trace au format JSON '''
+		
+		with open(path, 'w') as file:
+			json.dump(self.summary(generations, total_time), file, indent=1)
+
+
+def _island(pvc, index, inbox, results, stop, seed):
+	''' 
+		Evolution d'une île dans un processus séparé
+		Envoie ses meilleures solutions au processus principal toutes les MIGRATION_INTERVAL générations et intègre les migrants reçus
+	'''
+	
+	pvc.rng = random.Random(seed)	# chaque île a sa propre suite aléatoire
+	
+	if pvc.profiler:
+		pvc.profiler = pvc.evaluator.profiler = Profiler()	# compteurs propres à l'île, cumulés par le processus principal
+	
+	try:
+		pvc.start_clock()
+		pvc.population = pvc.create_population()
+		
+		while not (stop.is_set() or pvc.is_ended()):
+			pvc.evolve()
+			
+			if pvc.generations % PVC.MIGRATION_INTERVAL == 0:
+				elites = [s.tour for s in pvc.population.solutions[:PVC.MIGRATION_SIZE]]
+				results.put((False, index, pvc.generations, pvc.total_distance, elites, False, None, None))
+				
+				try:
+					while True:
+						pvc.population.migrate(inbox.get_nowait())
+				except queue.Empty:
+					pass
+	except Exception:
+		# erreur transmise au processus principal, qui arrête les autres îles
+		results.put((True, index, pvc.generations, None, None, False, None, traceback.format_exc()))
+		return
+	
+	# meilleure solution de la population: toujours évaluée, même si l'île est arrêtée avant sa première génération
+	best = pvc.population.solutions[0]
+	stats = pvc.profiler.stats() if pvc.profiler else None
+	results.put((True, index, pvc.generations, best.distance(), [best.tour], pvc.stagnated, stats, None))
+
+
+		
+class Population():
+	''' 
+		Classe représentant une population de solutions
+		La population évolue par sélection, croisement et mutation
+		La sélection utilise un certain nombre d'élites - 30% de la population
+		La sélection est faite par la suite avec l'algorithme de roulette (les solutions les + courtes ont + de chance d'être prises)
+			ou au choix par tournoi ou par rang; les parents d'une génération sont tirés en une seule fois
+		Le croisement effectué est par défaut le croisement greedy selon un certain taux (cf classe Solution)
+			Le croisement peut être forcé, par défaut lorsqu'un des parents a déjà été utilisé dans la génération
+		La mutation effectuée est un échange aléatoire de deux villes selon un certain taux (cf classe Solution)
+		Les doublons (même chemin à rotation et sens près, cf Solution.key) sont rejetés: les fils déjà présents avant leur
+			évaluation, puis lors du tri parmi les solutions de même distance
+		Les survivants sont extraits par un tas sur les distances, sans tri complet; les distances de la population triée
+			sont gardées dans un tableau parallèle (lengths)
+		Deux modèles d'évolution: générationnel (les fils et les élites forment la nouvelle population) ou stationnaire
+			(steady: chaque fils remplace la plus mauvaise solution s'il est meilleur)
+	'''
+	
+	# Taux d'élites par défaut (cf Config), entre 0.0 et 1.0
+	ELITE_RATE = 0.3
+	
+	# Taille de la population par défaut, définie expérimentalement; ne doit pas être trop élevé, sinon peu efficace
+	SIZE = 40
+	
+	# Modèles d'évolution disponibles, cf méthodes update_<nom>
+	MODELS = ('generational', 'steady')
+	
+	# Nombre de solutions tirées pour chaque tournoi de la sélection par tournoi
+	TOURNAMENT_SIZE = 3
+	
+	# Méthodes de sélection disponibles, cf méthodes selection_<nom>
+	SELECTIONS = ('roulette', 'tournament', 'rank')
+	
+	# Nombre maximum de tirages de couples par génération pour remplacer les fils rejetés comme doublons
+	BREED_ROUNDS = 4
+	
+	# Ecart relatif de distance en dessous duquel deux solutions sont comparées pour détecter un doublon
+	DUPLICATE_EPSYLON = 1e-9
+	
+	# Politiques de croisement forcé (sans tenir compte du taux de croisement):
+	#	reuse: si un des parents a déjà été utilisé dans la génération, always: toujours, never: jamais
+	FORCE_CROSSOVER = ('reuse', 'always', 'never')
+		
+	def __init__(self, tour, distances, crossover='gsx', selection='roulette', force_crossover='reuse', evaluator=None,
+			initial_tours=(), profiler=None, rng=None, config=None):
+		''' 
+			génération de la population initiale aléatoirement, à partir d'un chemin initial (indices de villes)
+			les chemins initial_tours (construits par heuristiques) remplacent une partie des chemins aléatoires
+			profiler mesure le temps de chaque phase d'une génération (None: pas de mesure)
+			rng: générateur aléatoire (random.Random) de la population et de ses solutions, par défaut le générateur global
+			config: paramètres de l'algorithme (cf Config): taille, modèle d'évolution, taux d'élites, de croisement et de mutation
+		'''
+		
+		self.rng = rng if rng is not None else random
+		self.config = config if config is not None else Config()
+		self.size = self.config.size(len(tour))
+		
+		# taux courants, ajustés à chaque génération en mode adaptatif
+		self.crossover_rate = self.config.crossover_rate
+		self.mutation_rate = self.config.mutation_rate
+		self.stall = 0	# générations sans amélioration de la meilleure distance
+		
+		Population.check_options(crossover, selection, force_crossover)
+		
+		self.force_crossover = force_crossover
+		
+		# modèle d'évolution, effectuant une génération
+		self.update = getattr(self, 'update_' + self.config.model)
+		
+		# opérateur de croisement, produisant deux fils à partir de deux parents
+		self.crossover = getattr(Solution, 'crossover_' + crossover)
+		
+		# méthode de sélection, tirant k indices de parents dans la population triée
+		self.select = getattr(self, 'selection_' + selection)
+		
+		# évaluation groupée des distances des nouvelles solutions
+		self.evaluator = evaluator if evaluator is not None else BatchEvaluator(distances)
+		
+		self.profiler = profiler
+		
+		basic_solution = Solution(array('i', tour), distances, self.rng)	# solution originale
+		
+		self.solutions = [basic_solution]
+		self.solutions.extend([Solution(array('i', t), distances, self.rng) for t in initial_tours])
+		
+		# génération des solutions restantes: copie de l'originale et ordonnancement aléatoire
+		for _ in range(4 * self.size - len(initial_tours)):
+			s = basic_solution.clone()
+			s.randomize()
+			self.solutions.append(s)
+		
+		# évaluation et sélection initiale
+		self.evaluator.evaluate(self.solutions)
+		self.order_by_distance_and_shrink()
+		
+		self.best = self.lengths[0]
+						
+	@staticmethod
+	def check_options(crossover, selection, force_crossover):
+		''' vérifie les noms de l'opérateur de croisement, de la sélection et de la politique de croisement forcé '''
+		
+		if crossover not in Solution.CROSSOVERS:
+			raise ValueError("Croisement inconnu: %s (possibles: %s)" % (crossover, ", ".join(Solution.CROSSOVERS)))
+		
+		if selection not in Population.SELECTIONS:
+			raise ValueError("Sélection inconnue: %s (possibles: %s)" % (selection, ", ".join(Population.SELECTIONS)))
+		
+		if force_crossover not in Population.FORCE_CROSSOVER:
+			raise ValueError("Croisement forcé inconnu: %s (possibles: %s)" % (force_crossover, ", ".join(Population.FORCE_CROSSOVER)))
+	
+	def order_by_distance_and_shrink(self):
+		''' 
+			sélection des size plus courtes solutions, triées par distance, avec retrait des doublons
+			les solutions sont extraites d'un tas de distances: O(M + size.log M) au lieu d'un tri complet des M solutions
+			seules les solutions de même distance (à l'arrondi près) qu'une précédente sont comparées par leur clé
+		'''
+		
+		candidates = self.solutions
+		heap = [(s.distance(), i) for i, s in enumerate(candidates)]
+		heapq.heapify(heap)
+		
+		solutions = []
+		lengths = []
+		keys = None		# clés de la série de solutions de même distance en cours
+		last = None
+		
+		while heap:
+			d, i = heapq.heappop(heap)
+			s = candidates[i]
+			
+			if last is not None and d - last <= Population.DUPLICATE_EPSYLON * d:
+				if keys is None:
+					keys = {solutions[-1].key()}
+				
+				key = s.key()
+				if key in keys:
+					continue
+				keys.add(key)
+			else:
+				keys = None
+				last = d
+			
+			solutions.append(s)
+			lengths.append(d)
+			
+			# limite la taille de la population
+			if len(solutions) == self.size:
+				break
+		
+		if self.profiler:
+			self.profiler.count('duplicates', min(len(candidates), self.size) - len(solutions))
+		
+		self.solutions = solutions
+		self.lengths = lengths
+		
+	def update_generational(self):
+		''' mise à jour de la population par sélection, croisement et mutation '''
+		
+		profiler = self.profiler
+		
+		if profiler:
+			start = time.perf_counter()
+		
+		# sélection des élites
+		elite_rate = self.config.elite_rate
+		elite = max(int(self.size * elite_rate), 1)
+				
+		new_solutions = self.solutions[:elite]
+		
+		# création de la nouvelle population par croisement (selon taux) de l'ancienne population
+		# les parents sont tirés en une fois dans l'ancienne population (roulette, tournoi ou rang)
+		
+		pairs = (self.size + 2 - elite) // 2	# nombre de couples pour dépasser size solutions
+		target = elite + 2 * pairs
+		
+		policy = self.force_crossover
+		used = bytearray(len(self.solutions))	# marquage des parents déjà utilisés, par indice
+		
+		# clés des solutions de la nouvelle population: un fils identique à une solution présente est rejeté sans évaluation
+		seen = {s.key() for s in new_solutions}
+		rejected = crossovers = 0
+		
+		# les fils rejetés sont remplacés par de nouveaux couples, en quelques tirages au plus
+		for _ in range(Population.BREED_ROUNDS):
+			missing = target - len(new_solutions)
+			
+			if missing <= 0:
+				break
+			
+			parents = self.select(missing + missing % 2)
+			
+			if profiler:
+				start = profiler.lap('selection', start)
+			
+			for a, b in zip(parents[::2], parents[1::2]):
+				# force le croisement selon la politique, par défaut si la sélection donne une solution déjà utilisée
+				if policy == 'reuse':
+					force = used[a] or used[b]
+				else:
+					force = policy == 'always'
+				
+				used[a] = used[b] = 1
+				crossovers += 1
+				
+				for child in self.crossover(self.solutions[a], self.solutions[b], force, self.crossover_rate):
+					key = child.key()
+					
+					if key in seen:
+						rejected += 1
+					else:
+						seen.add(key)
+						new_solutions.append(child)
+			
+			if profiler:
+				start = profiler.lap('crossover', start)
+		
+		# complément éventuel par des copies mutées (un échange) de solutions de la population
+		for _ in range(2 * max(target - len(new_solutions), 0)):
+			if len(new_solutions) >= target:
+				break
+			
+			s = self.rng.choice(self.solutions).clone()
+			s.mutate_swap(100, 0)
+			key = s.key()
+			
+			if key not in seen:
+				seen.add(key)
+				new_solutions.append(s)
+		
+		if profiler:
+			start = profiler.lap('crossover', start)
+			profiler.count('crossovers', crossovers)
+			profiler.count('duplicates', rejected)
+		
+		# évaluation groupée des fils, la mutation met ensuite à jour leur distance par différence
+		self.evaluator.evaluate(new_solutions)
+		
+		if profiler:
+			start = profiler.lap('evaluation', start)
+				
+		# mutation dans la population (selon taux)
+		tries = 0
+		rate, max_tries = self.mutation_rate, self.config.mutation_tries
+		for s in new_solutions[1:]: # ne mute pas l'élite n° 1
+			tries += s.mutate_swap(rate, max_tries)
+		
+		if profiler:
+			start = profiler.lap('mutation', start)
+			profiler.count('swap_tries', tries)
+
+		# mise à jour de la population
+		self.solutions = new_solutions
+		self.order_by_distance_and_shrink()
+		
+		if profiler:
+			profiler.lap('sort', start)
+		
+		if self.config.adaptive:
+			self.adapt()
+	
+	def update_steady(self):
+		''' 
+			mise à jour stationnaire: autant de couples que pour une génération, chaque fils (évalué puis muté) remplace
+			la plus mauvaise solution s'il est plus court et n'est pas un doublon; les élites sont ainsi toujours gardées
+			les parents sont tirés en une fois, la population restant triée par insertion dans le tableau des distances
+		'''
+		
+		profiler = self.profiler
+		
+		if profiler:
+			start = time.perf_counter()
+		
+		elite = max(int(self.size * self.config.elite_rate), 1)
+		pairs = (self.size + 2 - elite) // 2
+		
+		indices = self.select(2 * pairs)
+		parents = [self.solutions[i] for i in indices]
+		
+		if profiler:
+			start = profiler.lap('selection', start)
+		
+		policy = self.force_crossover
+		used = bytearray(len(self.solutions))
+		
+		seen = {s.key() for s in self.solutions}
+		solutions, lengths = self.solutions, self.lengths
+		rejected = tries = 0
+		rate, max_tries = self.mutation_rate, self.config.mutation_tries
+		
+		for k in range(pairs):
+			a, b = indices[2 * k], indices[2 * k + 1]
+			
+			if policy == 'reuse':
+				force = used[a] or used[b]
+			else:
+				force = policy == 'always'
+			
+			used[a] = used[b] = 1
+			
+			children = self.crossover(parents[2 * k], parents[2 * k + 1], force, self.crossover_rate)
+			
+			if profiler:
+				start = profiler.lap('crossover', start)
+			
+			self.evaluator.evaluate(children)
+			
+			if profiler:
+				start = profiler.lap('evaluation', start)
+			
+			for child in children:
+				tries += child.mutate_swap(rate, max_tries)
+			
+			if profiler:
+				start = profiler.lap('mutation', start)
+			
+			# remplacement de la plus mauvaise solution
+			for child in children:
+				d = child.distance()
+				
+				if len(solutions) >= self.size and d >= lengths[-1]:
+					continue
+				
+				key = child.key()
+				
+				if key in seen:
+					rejected += 1
+					continue
+				
+				seen.add(key)
+				position = bisect.bisect_right(lengths, d)
+				solutions.insert(position, child)
+				lengths.insert(position, d)
+				
+				if len(solutions) > self.size:
+					seen.discard(solutions.pop().key())
+					lengths.pop()
+			
+			if profiler:
+				start = profiler.lap('sort', start)
+		
+		if profiler:
+			profiler.count('crossovers', pairs)
+			profiler.count('duplicates', rejected)
+			profiler.count('swap_tries', tries)
+		
+		if self.config.adaptive:
+			self.adapt()
+	
+	def adapt(self):
+		''' ajuste les taux de croisement et de mutation selon la diversité de la population et la stagnation (cf Config.rates) '''
+		
+		lengths = self.lengths
+		best = lengths[0]
+		
+		if best < self.best:
+			self.stall = 0
+		else:
+			self.stall += 1
+		
+		self.best = best
+		
+		spread = (lengths[-1] - best) / best if best else 0.0
+		self.crossover_rate, self.mutation_rate = self.config.rates(spread, self.stall)
+	
+	def improve(self, local_search, deadline=None, checks=None):
+		''' 
+			recherche locale sur les meilleures solutions qui ne sont pas encore des optimums locaux,
+			jusqu'au temps limite ou dans la limite d'un nombre de villes examinées (checks, indépendant de la machine)
+		'''
+		
+		for s in self.solutions:
+			if deadline is not None and time.perf_counter() >= deadline:
+				break
+			
+			if checks is not None and checks <= 0:
+				break
+			
+			if s.local_optimum:
+				continue
+			
+			done = local_search.improve(s, deadline, checks)
+			
+			if checks is not None:
+				checks -= local_search.checks
+			
+			if not done:
+				break
+		
+		# plusieurs solutions peuvent mener au même optimum local
+		self.order_by_distance_and_shrink()
+	
+	def migrate(self, tours):
+		''' intègre des chemins venus d'une autre population en remplaçant les plus mauvaises solutions '''
+		
+		if self.profiler:
+			start = time.perf_counter()
+		
+		distances = self.solutions[0].distances
+		
+		self.solutions[-len(tours):] = [Solution(array('i', t), distances, self.rng) for t in tours]
+		self.evaluator.evaluate(self.solutions)
+		self.order_by_distance_and_shrink()
+		
+		if self.profiler:
+			self.profiler.lap('migration', start)
+			self.profiler.count('migrants', len(tours))
+	
+	def selection_roulette(self, k):
+		''' 
+			Sélection aléatoire par roulette de k solutions, les solutions les plus courtes ayant le plus de probabilité d'être choisies
+			La table des poids cumulés est construite une seule fois pour tous les tirages
+		'''
+		
+		# distance minimum, utilisée comme référence pour les poids de la roulette
+		min_dist = self.lengths[0]
+		
+		cum_weights = list(accumulate([min_dist / d if d else 1.0 for d in self.lengths]))
+		
+		return self.rng.choices(range(len(self.solutions)), cum_weights=cum_weights, k=k)
+	
+	def selection_tournament(self, k):
+		''' sélection de k solutions par tournoi: la meilleure de TOURNAMENT_SIZE solutions tirées au hasard '''
+		
+		size = Population.TOURNAMENT_SIZE
+		
+		# la population étant triée, le meilleur d'un tournoi est le plus petit indice tiré
+		draws = self.rng.choices(range(len(self.solutions)), k=k * size)
+		
+		return [min(draws[i:i + size]) for i in range(0, k * size, size)]
+	
+	def selection_rank(self, k):
+		''' sélection de k solutions par rang: poids linéaire décroissant de N (meilleure) à 1 (moins bonne) '''
+		
+		n = len(self.solutions)
+		
+		return self.rng.choices(range(n), cum_weights=list(accumulate(range(n, 0, -1))), k=k)
+
+	def __repr__(self):
+		return str(self.solutions)
+
+
+class Solution():
+	'''
+		Classe représentant une solution de chemin entre des villes
+		Le chemin est un tableau compact (array 'i') d'indices dans la table des villes partagée
+		La solution mute et se croise avec une autre pour produire des enfants, selon des taux respectifs
+		La mutation échange aléatoirement deux villes dans le chemin
+		Le croisement effectue un Greedy Subtour Crossover (GSX), issu du document arob98.pdf
+		Le croisement OX (document GA.pdf) a aussi été implémenté dans un premier temps
+		La distance calculée de la solution est gardée en mémoire après un calcul (reset en cas de changement, mutation)
+		Les distances entre villes sont lues dans une matrice de distances partagée par toutes les solutions
+	'''
+	
+	# Taux de mutation en pourcent, par défaut (cf Config)
+	# Plus efficace avec de petits taux, sinon cela créé des instabilités
+	MUTATION_RATE = 10
+	
+	# Taux de croiseement en pourcent, par défaut (cf Config)
+	# Plus efficace avec un grand taux, sinon cela créé de la stagnation
+	CROSSOVER_RATE = 75
+	
+	# Nombre d'essais maximum de mutation par swap pour trouver une distance de chemin résultante plus courte
+	MUTATION_RANDOM_TRY = 25
+	
+	# Opérateurs de croisement disponibles, cf méthodes crossover_<nom>
+	CROSSOVERS = ('gsx', 'ox', 'pmx', 'erx')
+	
+	__slots__ = ('tour', 'distances', 'rng', '_distance', 'local_optimum')
+
+	def __init__(self, tour, distances, rng=random):
+		''' 
+			initialisation de la solution à partir d'un chemin (array d'indices de villes) 
+			rng: générateur aléatoire (random.Random) partagé par la population, par défaut le générateur global
+		'''
+		
+		self.tour = tour
+		self.distances = distances	# matrice de distances partagée
+		self.rng = rng
+		self._distance = None	# distance interne stockée après calcul
+		self.local_optimum = False	# chemin déjà amélioré par la recherche locale
+				
+	def mutate_swap(self, rate=MUTATION_RATE, max_tries=MUTATION_RANDOM_TRY):
+		''' 
+			Effectue une mutation de la solution (swap selon taux) en échangeant deux villes dans le chemin 
+			Ajoute une légère intelligence en essayant de trouver une mutation qui diminue la distance totale de chemin
+			Chaque essai est évalué en O(1) par la variation des seules arêtes touchées par l'échange
+			Retourne le nombre d'échanges essayés (0 sans mutation)
+		'''
+
+		# taux de mutation, aucun échange possible avec moins de 2 villes
+		if self.rng.random() * 100 >= rate or len(self.tour) < 2:
+			return 0
+		
+		old_distance = self.distance()
+		tour = self.tour
+		n = len(tour)
+		
+		# échange de 2 villes, en essayant de trouver une nouvelle distance totale plus courte que l'ancienne
+		i = 0
+		while True:
+			ind1, ind2 = self.random_index()
+			
+			# arêtes touchées par l'échange, repérées par l'indice de leur ville de départ
+			edges = {(ind1 - 1) % n, ind1, (ind2 - 1) % n, ind2}
+			before = self.edges_length(edges)
+			
+			tour[ind1], tour[ind2] = tour[ind2], tour[ind1]
+			
+			delta = self.edges_length(edges) - before
+			
+			# condition de fin de mutation: distance + courte ou trop d'essai
+			if delta < 0 or i >= max_tries:
+				break
+			
+			else:
+				tour[ind1], tour[ind2] = tour[ind2], tour[ind1]
+				i += 1
+
+		self._distance = old_distance + delta # màj de la distance stockée sans recalcul complet
+		self.local_optimum = False
+		
+		return i + 1
+		
+	def crossover_greedy(self, solution2, force=False, rate=CROSSOVER_RATE):
+		''' 
+			Effectue un croisement selon l'algorithme Greedy Subtour Crossover (GSX) et taux
+			Implémentation en O(N): appartenance au sous-chemin par tableau de marquage et sous-chemin construit dans une deque
+		'''
+		
+		# taux de croisement
+		if not force and self.rng.random() * 100 >= rate:
+			return self.clone()
+
+		fa = True
+		fb = True
+		
+		tour_a = self.tour
+		tour_b = solution2.tour
+		
+		t = self.rng.choice(tour_a)	# ville
+		
+		# positions de départ: une seule recherche linéaire par parent
+		x = tour_a.index(t)
+		y = tour_b.index(t)
+		
+		n = len(tour_a)
+		
+		g = deque([t])		# nouveau chemin de la solution croisée, étendu par les deux bouts
+		used = bytearray(n)	# marquage des villes déjà présentes dans g
+		used[t] = 1
+		
+		# croisement
+		while fa or fb:
+			x = (x - 1) % n
+			y = (y + 1) % n
+			
+			if fa:
+				c = tour_a[x]
+				if not used[c]:
+					g.appendleft(c)
+					used[c] = 1
+				else:
+					fa = False
+					
+			if fb:
+				c = tour_b[y]
+				if not used[c]:
+					g.append(c)
+					used[c] = 1
+				else:
+					fb = False
+					
+		# complétion par les villes restantes dans un ordre aléatoire
+		if len(g) < n:
+			l = list(tour_a)
+			self.rng.shuffle(l)
+			
+			g.extend([c for c in l if not used[c]])
+					
+		# solution issue du croisement
+		return Solution(array('i', g), self.distances, self.rng)
+	
+	def crossover_gsx(self, solution2, force=False, rate=CROSSOVER_RATE):
+		''' effectue deux croisements GSX, un depuis chaque parent, génèrant deux fils '''
+		return self.crossover_greedy(solution2, force, rate), solution2.crossover_greedy(self, force, rate)
+	
+	def crossover_ox(self, solution2, force=False, rate=CROSSOVER_RATE):
+		''' effectue un croisement OX entre la solution courante et la solution2, génèrant deux fils '''
+		
+		# taux
+		if not force and self.rng.random() * 100 >= rate:
+			return self.clone(), solution2.clone()
+				
+		length = len(self.tour)
+		ind_max = length - 1
+		length_cross = ind_max // 2	# longueur de la moitié de longueur de solution
+		# indices début/fin du croisement
+		ind_start = self.rng.randint(1, ind_max - length_cross)
+		ind_stop = ind_start + length_cross - 1
+		
+		# chaque fils reçoit la partie début->fin de l'autre parent, complétée dans l'ordre de son parent
+		return self._crossover_ox(solution2, ind_start, ind_stop), solution2._crossover_ox(self, ind_start, ind_stop)
+	
+	def _crossover_ox(self, solution, ind_start, ind_stop):
+		''' 
+			Implémentation du croisement OX en O(N): le fils garde la partie début->fin de solution
+			et reçoit les autres villes dans l'ordre de la solution courante, à partir de la fin de cette partie
+		'''
+		
+		tour = self.tour
+		length = len(tour)
+		
+		new_cities = array('i', solution.tour)
+		used = bytearray(length)	# villes déjà placées dans la partie début->fin
+		for city in solution.tour[ind_start:ind_stop + 1]:
+			used[city] = 1
+		
+		j = ind_stop + 1
+		for i in range(ind_stop + 1, ind_stop + 1 + length):
+			city = tour[i % length]
+			
+			if not used[city]:
+				new_cities[j % length] = city
+				j += 1
+		
+		return Solution(new_cities, self.distances, self.rng)
+	
+	def crossover_pmx(self, solution2, force=False, rate=CROSSOVER_RATE):
+		''' effectue un croisement Partially Mapped Crossover (PMX) entre la solution courante et la solution2, génèrant deux fils '''
+		
+		# taux
+		if not force and self.rng.random() * 100 >= rate:
+			return self.clone(), solution2.clone()
+		
+		# indices début/fin (exclue) du segment échangé
+		ind_start, ind_stop = sorted(self.rng.sample(range(len(self.tour) + 1), 2))
+		
+		return self._crossover_pmx(solution2, ind_start, ind_stop), solution2._crossover_pmx(self, ind_start, ind_stop)
+	
+	def _crossover_pmx(self, solution, ind_start, ind_stop):
+		''' 
+			Implémentation du croisement PMX en O(N): le fils reçoit le segment de solution, le reste venant de la solution courante
+			Les villes en conflit sont remplacées en suivant la correspondance entre les deux segments
+			Chaque chaîne de correspondance n'est parcourue qu'une fois, car elle ne peut commencer que par un seul conflit
+		'''
+		
+		tour = self.tour
+		segment = solution.tour
+		length = len(tour)
+		
+		new_cities = array('i', tour)
+		mapping = array('i', [-1]) * length	# ville du segment -> ville remplacée à la même position
+		
+		for i in range(ind_start, ind_stop):
+			new_cities[i] = segment[i]
+			mapping[segment[i]] = tour[i]
+		
+		for i in chain(range(ind_start), range(ind_stop, length)):
+			city = tour[i]
+			
+			while mapping[city] != -1:
+				city = mapping[city]
+				
+			new_cities[i] = city
+			
+		return Solution(new_cities, self.distances, self.rng)
+	
+	def crossover_erx(self, solution2, force=False, rate=CROSSOVER_RATE):
+		''' effectue un croisement Edge Recombination (ERX) entre la solution courante et la solution2, génèrant deux fils '''
+		
+		# taux
+		if not force and self.rng.random() * 100 >= rate:
+			return self.clone(), solution2.clone()
+		
+		# table des voisins commune aux deux parents (au plus 4 voisins par ville)
+		neighbors = [set() for _ in self.tour]
+		
+		for tour in (self.tour, solution2.tour):
+			old = tour[-1]
+			for city in tour:
+				neighbors[city].add(old)
+				neighbors[old].add(city)
+				old = city
+		
+		# un fils démarre de la première ville de chaque parent, la table est consommée par le croisement
+		child1 = self._crossover_erx([set(n) for n in neighbors], self.tour[0])
+		child2 = solution2._crossover_erx(neighbors, solution2.tour[0])
+		
+		return child1, child2
+	
+	def _crossover_erx(self, neighbors, city):
+		''' 
+			Implémentation du croisement ERX en O(N) à partir d'une table des voisins (modifiée) et d'une ville de départ
+			La ville suivante est le voisin ayant le moins de voisins restants, sinon une ville non visitée au hasard
+		'''
+		
+		length = len(neighbors)
+		
+		visited = bytearray(length)
+		remaining = list(self.tour)	# ordre de secours aléatoire pour les villes sans voisin restant
+		self.rng.shuffle(remaining)
+		
+		new_cities = array('i')
+		
+		while True:
+			new_cities.append(city)
+			visited[city] = 1
+			
+			candidates = neighbors[city]
+			for n in candidates:
+				neighbors[n].discard(city)
+			
+			if len(new_cities) == length:
+				break
+			
+			if candidates:
+				fewest = min([len(neighbors[n]) for n in candidates])
+				city = self.rng.choice([n for n in candidates if len(neighbors[n]) == fewest])
+			else:
+				while visited[remaining[-1]]:
+					remaining.pop()
+				city = remaining.pop()
+				
+		return Solution(new_cities, self.distances, self.rng)
+				
+	def clone(self):
+		''' copie profonde d'une solution, distance stockée comprise '''
+		
+		s = Solution(array('i', self.tour), self.distances, self.rng)
+		s._distance = self._distance
+		s.local_optimum = self.local_optimum
+		
+		return s
+
+	def randomize(self):
+		''' réorganisation aléatoire des villes de la solution '''
+		self.rng.shuffle(self.tour)
+		
+		self._distance = None
+		self.local_optimum = False
+
+	def distance(self):
+		''' calcule la distance totale du chemin représenté par la solution ''' 
+		
+		# calcul de la distance si non effectué, à partir de la matrice de distances
+		if self._distance is None:
+			self._distance = self.distances.tour_length(self.tour)
+
+		return self._distance
+
+	def key(self):
+		''' 
+			clé canonique du chemin, identique pour toutes ses rotations et ses deux sens de parcours
+			le chemin est lu depuis la ville 0, dans le sens où la ville suivante a le plus petit indice
+		'''
+		
+		tour = self.tour
+		
+		if not tour:
+			return b''
+		
+		i = tour.index(0)
+		t = tour[i:] + tour[:i]
+		
+		if len(t) > 2 and t[1] > t[-1]:
+			t = t[:1] + t[:0:-1]
+		
+		return t.tobytes()
+
+	def edges_length(self, edges):
+		''' somme des longueurs des arêtes du chemin données par l'indice de leur ville de départ '''
+		
+		tour = self.tour
+		dist = self.distances.dist
+		n = len(tour)
+		
+		return sum([dist(tour[k], tour[(k + 1) % n]) for k in edges])
+	
+	def random_index(self):
+		''' retourne deux indices aléatoires dans la liste des villes '''
+		
+		n = len(self.tour)
+		rnd = self.rng.random
+		a, b = 0, 0
+		
+		while a == b:
+			a = int(rnd() * n)
+			b = int(rnd() * n)
+			
+		return a, b
+
+	def __repr__(self):
+		return str(list(self.tour))
+
+
+class Config():
+	'''
+		Paramètres de l'algorithme génétique propres à une résolution, les constantes des classes restant les valeurs par défaut
+		Plusieurs résolutions peuvent ainsi être menées en parallèle avec des réglages différents
+			population_size: taille de la population (0: Population.SIZE, ou proportionnelle à racine de N en mode adaptatif)
+			model: modèle d'évolution (cf Population.MODELS)
+			elite_rate: part d'élites gardées à chaque génération, entre 0.0 et 1.0
+			crossover_rate, mutation_rate: taux de croisement et de mutation en pourcent
+			mutation_tries: nombre d'essais maximum d'une mutation pour trouver un chemin plus court
+			stagnation_size: fenêtre de générations de la condition de stagnation
+			adaptive: taille de population selon le nombre de villes, taux ajustés selon la diversité et la stagnation
+			local_search_checks: budget de la recherche locale en villes examinées par ville et par génération, au lieu
+				d'une part du temps (0: part du temps); indépendant de la machine, donc reproductible avec une graine
+		En mode adaptatif, la mutation augmente et le croisement diminue lorsque la population perd sa diversité
+			(écart relatif entre la pire et la meilleure distance) ou que la meilleure distance ne s'améliore plus
+	'''
+	
+	# Taille de population adaptative: SIZE_FACTOR * racine de N, bornée
+	SIZE_FACTOR = 4
+	SIZE_MIN = 10
+	SIZE_MAX = 200
+	
+	# Taux extrêmes atteints en mode adaptatif, en pourcent
+	MUTATION_RATE_MAX = 50
+	CROSSOVER_RATE_MIN = 40
+	
+	# Ecart relatif entre la pire et la meilleure distance sous lequel la population est jugée peu diverse
+	DIVERSITY_LOW = 0.01
+	
+	# Nombre de générations sans amélioration pour atteindre les taux extrêmes
+	ADAPTIVE_WINDOW = 50
+	
+	def __init__(self, population_size=0, model='generational', elite_rate=Population.ELITE_RATE,
+			crossover_rate=Solution.CROSSOVER_RATE, mutation_rate=Solution.MUTATION_RATE,
+			mutation_tries=Solution.MUTATION_RANDOM_TRY, stagnation_size=PVC.STAGNATION_SIZE, adaptive=False,
+			local_search_checks=0):
+		''' vérifie et stocke les paramètres '''
+		
+		if model not in Population.MODELS:
+			raise ValueError("Modèle d'évolution inconnu: %s (possibles: %s)" % (model, ", ".join(Population.MODELS)))
+		
+		if not 0 <= elite_rate <= 1:
+			raise ValueError("Taux d'élites invalide: %s (entre 0 et 1)" % elite_rate)
+		
+		if not (0 <= crossover_rate <= 100 and 0 <= mutation_rate <= 100):
+			raise ValueError("Taux de croisement ou de mutation invalide: %s, %s (entre 0 et 100)" % (crossover_rate, mutation_rate))
+		
+		if local_search_checks < 0:
+			raise ValueError("Budget de recherche locale invalide: %s (positif)" % local_search_checks)
+		
+		self.population_size = population_size
+		self.model = model
+		self.elite_rate = elite_rate
+		self.crossover_rate = crossover_rate
+		self.mutation_rate = mutation_rate
+		self.mutation_tries = mutation_tries
+		self.stagnation_size = stagnation_size
+		self.adaptive = adaptive
+		self.local_search_checks = local_search_checks
+	
+	def size(self, n):
+		''' taille de la population pour n villes '''
+		
+		if self.population_size > 0:
+			return self.population_size
+		
+		if self.adaptive:
+			return max(Config.SIZE_MIN, min(Config.SIZE_MAX, int(Config.SIZE_FACTOR * math.sqrt(n))))
+		
+		return Population.SIZE
+	
+	def rates(self, spread, stall):
+		''' 
+			taux de croisement et de mutation pour une population d'écart relatif spread, sans amélioration depuis stall générations
+			interpolation linéaire entre les taux de base et les taux extrêmes selon la plus forte des deux pressions
+		'''
+		
+		pressure = max(min(stall / Config.ADAPTIVE_WINDOW, 1.0), max(1.0 - spread / Config.DIVERSITY_LOW, 0.0))
+		
+		crossover_rate = self.crossover_rate + (min(Config.CROSSOVER_RATE_MIN, self.crossover_rate) - self.crossover_rate) * pressure
+		mutation_rate = self.mutation_rate + (max(Config.MUTATION_RATE_MAX, self.mutation_rate) - self.mutation_rate) * pressure
+		
+		return crossover_rate, mutation_rate
+	
+	def as_dict(self):
+		''' paramètres sous forme de dictionnaire (enregistrement, JSON) '''
+		return dict(vars(self))
+	
+	def __repr__(self):
+		return "Config(%s)" % ", ".join("%s=%r" % item for item in vars(self).items())
+
+
+def distance_matrix(xs, ys):
+	''' 
+		construit la matrice de distances des villes de coordonnées xs, ys adaptée au nombre de villes:
+		complète pour les petits problèmes, paresseuse sinon
+	'''
+	
+	if len(xs) <= DistanceMatrix.MAX_CITIES:
+		return DistanceMatrix(xs, ys)
+	
+	return LazyDistanceMatrix(xs, ys)
+
+
+class DistanceMatrix():
+	'''
+		Matrice complète des distances euclidiennes entre les villes, calculée une seule fois à la création
+		Les villes sont désignées par leur indice dans la table des villes reçue à la création
+		Chaque ligne est un tableau de flottants (array 'd'), soit 8 octets par distance et N² distances en mémoire
+	'''
+	
+	# Nombre de villes maximum pour une matrice complète, au-delà la mémoire N² devient trop importante
+	MAX_CITIES = 2000
+	
+	def __init__(self, xs, ys):
+		''' calcul de toutes les distances entre les villes de coordonnées xs, ys '''
+		
+		hypot = math.hypot
+		
+		self.size = len(xs)
+		self.xs = array('d', xs)
+		self.ys = array('d', ys)
+		self.rows = [array('d', [hypot(x - x2, y - y2) for x2, y2 in zip(xs, ys)]) for x, y in zip(xs, ys)]
+		
+	def add(self, x, y):
+		''' ajoute une ville en position x;y: une nouvelle ligne, et une nouvelle colonne à chaque ligne existante '''
+		
+		hypot = math.hypot
+		row = array('d', [hypot(x - x2, y - y2) for x2, y2 in zip(self.xs, self.ys)])
+		
+		for r, d in zip(self.rows, row):
+			r.append(d)
+		
+		row.append(0.0)
+		self.rows.append(row)
+		self.xs.append(x)
+		self.ys.append(y)
+		self.size += 1
+	
+	def remove(self, keep):
+		''' ne garde que les villes d'indices keep (croissants), renumérotées de 0 à len(keep) - 1, sans recalcul '''
+		
+		pick = itemgetter(*keep) if len(keep) > 1 else lambda r: [r[i] for i in keep]
+		
+		self.rows = [array('d', pick(self.rows[i])) for i in keep]
+		self.xs = array('d', pick(self.xs))
+		self.ys = array('d', pick(self.ys))
+		self.size = len(keep)
+	
+	def row(self, i):
+		''' retourne les distances de la ville i à toutes les autres villes '''
+		return self.rows[i]
+	
+	def dist(self, i, j):
+		''' retourne la distance entre les villes i et j '''
+		return self.rows[i][j]
+	
+	def tour_length(self, tour):
+		''' calcule la longueur totale d'un chemin fermé donné par des indices de villes '''
+		
+		if not tour:
+			return 0.0
+		
+		rows = self.rows
+		distance = 0.0
+		
+		old = tour[-1]
+		
+		for i in tour:
+			distance += rows[old][i]
+			old = i
+			
+		return distance
+	
+	
+class LazyDistanceMatrix():
+	'''
+		Matrice des distances paresseuse, pour les grands problèmes ou une matrice complète serait trop volumineuse
+		Seules les coordonnées sont gardées: les distances et les longueurs de chemin sont calculées à la demande
+	'''
+	
+	def __init__(self, xs, ys):
+		''' mémorise les coordonnées xs, ys des villes, aucune distance n'est calculée '''
+		
+		self.size = len(xs)
+		self.xs = array('d', xs)
+		self.ys = array('d', ys)
+		
+	def add(self, x, y):
+		''' ajoute une ville en position x;y '''
+		
+		self.xs.append(x)
+		self.ys.append(y)
+		self.size += 1
+	
+	def remove(self, keep):
+		''' ne garde que les villes d'indices keep (croissants), renumérotées de 0 à len(keep) - 1 '''
+		
+		self.xs = array('d', [self.xs[i] for i in keep])
+		self.ys = array('d', [self.ys[i] for i in keep])
+		self.size = len(keep)
+	
+	def dist(self, i, j):
+		''' retourne la distance entre les villes i et j, calculée depuis les coordonnées '''
+		
+		return math.hypot(self.xs[i] - self.xs[j], self.ys[i] - self.ys[j])
+	
+	def tour_length(self, tour):
+		''' calcule la longueur totale d'un chemin fermé donné par des indices de villes '''
+		
+		if not tour:
+			return 0.0
+		
+		xs, ys = self.xs, self.ys
+		hypot = math.hypot
+		distance = 0.0
+		
+		old = tour[-1]
+		ox, oy = xs[old], ys[old]
+		
+		for i in tour:
+			x, y = xs[i], ys[i]
+			distance += hypot(x - ox, y - oy)
+			ox, oy = x, y
+			
+		return distance
+
+
+def cheapest_insertion(tour, city, distances, candidates=()):
+	''' 
+		Insère la ville city dans le chemin tour (array d'indices) à la position la moins coûteuse
+		Seules les positions autour des villes candidates (plus proches voisins déjà dans le chemin) sont évaluées,
+			toutes les positions sinon
+		@return: l'augmentation de la longueur du chemin
+	'''
+	
+	n = len(tour)
+	dist = distances.dist
+	
+	if n < 2:
+		tour.append(city)
+		return 2 * dist(tour[0], city) if n else 0.0
+	
+	positions = [tour.index(j) for j in candidates] if candidates else range(n)
+	
+	best, best_position = None, 0
+	
+	for p in positions:
+		# insertion avant ou après la ville en position p
+		for i in (p, p + 1):
+			a, b = tour[i - 1], tour[i % n]
+			delta = dist(a, city) + dist(city, b) - dist(a, b)
+			
+			if best is None or delta < best:
+				best, best_position = delta, i
+	
+	tour.insert(best_position, city)
+	
+	return best
+
+
+_evaluator_distances = None	# matrice de distances d'un processus du pool d'évaluation
+
+def _init_evaluator(distances):
+	''' initialisation d'un processus du pool d'évaluation avec la matrice de distances '''
+	global _evaluator_distances
+	_evaluator_distances = distances
+
+def _tour_length(tour):
+	''' longueur d'un chemin calculée dans un processus du pool d'évaluation '''
+	return _evaluator_distances.tour_length(tour)
+
+
+class BatchEvaluator():
+	'''
+		Evaluation groupée des distances des solutions d'une génération qui n'ont pas encore été évaluées
+		Avec numpy, les chemins sont réunis dans un tableau 2-D d'indices et toutes les longueurs sont calculées
+			par indexation vectorisée des coordonnées
+		Sans numpy, chaque chemin est évalué par la matrice de distances
+		Pour les très grands problèmes, un pool de processus peut se répartir les chemins
+	'''
+	
+	# Nombre de villes minimum pour utiliser le pool de processus, en dessous le coût de transfert domine
+	POOL_MIN_CITIES = 5000
 	
-	def __init__(self, cities, maxtime):
-		''' initialise la résolution du PVC avec les villes à rejoindre '''
+	def __init__(self, distances, processes=0, profiler=None):
+		''' prépare l'évaluation avec une matrice de distances et éventuellement un pool de processus '''
 		
-		self.cities = cities
-		self.maxtime = maxtime
+		self.distances = distances
+		self.processes = processes
+		self.profiler = profiler	# comptage des distances calculées et réutilisées
+		self.pool = None
 		
-		self.total_distance = 0
-		self.total_time = 0
-		self.ordered_cities = list(self.cities)
+		if processes > 0 and distances.size >= BatchEvaluator.POOL_MIN_CITIES:
+			self.pool = multiprocessing.Pool(processes, _init_evaluator, (distances,))
 		
-		self.last_distances = []
+		if numpy is not None:
+			# copies des coordonnées, la matrice pouvant ensuite être modifiée (ajout/retrait de villes)
+			self.xs = numpy.array(distances.xs)
+			self.ys = numpy.array(distances.ys)
 		
-	def compute(self, gui=None):	
-		''' résoud un PVC à partir des données courantes : génération population, évolution, gestion de l'arrêt '''
+	def evaluate(self, solutions):
+		''' calcule et stocke les distances des solutions non évaluées '''
 		
-		self.start = time.clock()
-		self.population = Population(self.ordered_cities)
-
-		# évolution de la population jusqu'à la fin
-		while not self.is_ended():
-			# sélection, croisement et mutation de la population
-			self.population.update()
-			# récupération des résultats courants
-			self.ordered_cities = self.population.solutions[0].cities
-			self.total_distance = self.population.solutions[0].distance()
-			
-			# pour condition de fin
-			self.last_distances.append(self.total_distance)
-			
-			# màj GUI
-			if gui:
-				gui.draw()
-					
-	def is_ended(self):
-		''' vérifie si le calcul est terminé par stagnation ou temps '''
+		pending = [s for s in solutions if s._distance is None]
 		
-		self.total_time = time.clock() - self.start
+		if self.profiler:
+			self.profiler.count('evaluations', len(pending))
+			self.profiler.count('distance_hits', len(solutions) - len(pending))
 		
-		# arrêt selon temps
-		if (self.maxtime is not None and self.maxtime > 0):
-			return self.total_time >= self.maxtime
+		if not pending:
+			return
 		
-		length = len(self.last_distances)
+		tours = [s.tour for s in pending]
 		
-		# vérification de la population de fin par stagnation si au moins N derniers calculs
-		if length > PVC.STAGNATION_SIZE:
-			# calcul de la moyenne et de l'écart-type avec les N dernières meilleures distances
-			mean_dist = sum(self.last_distances) / length
-			std_dev = math.sqrt(1 / length * sum([pow(x - mean_dist, 2) for x in self.last_distances]))
-
-			# arrêt par stagnation si epsylon atteint sur l'écart-type
-			if std_dev <= PVC.STD_EPSYLON:
-				return True
+		if self.pool is not None:
+			lengths = self.pool.map(_tour_length, tours, chunksize=max(len(tours) // (4 * self.processes), 1))
+		elif numpy is not None:
+			lengths = self.tour_lengths(tours)
+		else:
+			lengths = [self.distances.tour_length(t) for t in tours]
 			
-			# sinon reset des derniers calculs, on recalcule dans N évolutions
-			else:
-				self.last_distances = []
+		for s, d in zip(pending, lengths):
+			s._distance = d
+	
+	def tour_lengths(self, tours):
+		''' longueurs de plusieurs chemins de même taille, calculées avec numpy sur un tableau 2-D d'indices '''
+		
+		indices = numpy.frombuffer(b''.join([t.tobytes() for t in tours]), dtype=numpy.intc).reshape(len(tours), -1)
+		
+		x = self.xs[indices]
+		y = self.ys[indices]
 		
-		return False
+		return numpy.hypot(x - numpy.roll(x, 1, axis=1), y - numpy.roll(y, 1, axis=1)).sum(axis=1).tolist()
+	
+	def close(self):
+		''' arrête le pool de processus éventuel '''
+		
+		if self.pool is not None:
+			self.pool.close()
+			self.pool.join()
+			self.pool = None
 
 
-		
-class Population():
-	''' 
-		Classe représentant une population de solutions
-		La population évolue par sélection, croisement et mutation
-		La sélection utilise un certain nombre d'élites - 30% de la population
-		La sélection est faite par la suite avec l'algorithme de roulette (les solutions les + courtes ont + de chance d'être prises)
-		Le croisement effectué est le croisement greedy selon un certain taux (cf classe Solution)
-		La mutation effectuée est un échange aléatoire de deux villes selon un certain taux (cf classe Solution)
+class SpatialGrid():
+	'''
+		Index spatial des villes par grille uniforme, environ CELL_CITIES villes par cellule
+		Les recherches de plus proches voisins parcourent des couronnes de cellules autour de la position,
+			et s'arrêtent dès que les couronnes suivantes ne peuvent plus contenir de ville plus proche
+		Fournit les k plus proches voisins d'une ville et deux heuristiques de construction de chemins:
+			plus proche voisin et glouton sur les arêtes
 	'''
 	
-	# Taux d'élites possible, entre 0.0 et 1.0
-	ELITE_RATE = 0.3
+	# Nombre moyen de villes par cellule
+	CELL_CITIES = 2
 	
-	# Taille de la population, définie expérimentalement; ne doit pas être trop élevé, sinon peu efficace
-	SIZE = 40
+	# Nombre de voisins candidats par ville pour la construction gloutonne
+	GREEDY_NEIGHBORS = 8
+	
+	def __init__(self, xs, ys):
+		''' répartit les villes de coordonnées xs, ys dans les cellules de la grille '''
 		
-	def __init__(self, cities):
-		''' génération de la population initiale aléatoirement '''
+		n = len(xs)
 		
-		basic_solution = Solution(list(cities))	# solution originale
+		self.xs = xs
+		self.ys = ys
+		self.size = n
 		
-		self.solutions = [basic_solution]
+		self.min_x = min(xs) if n else 0
+		self.min_y = min(ys) if n else 0
+		width = max(xs) - self.min_x if n else 0
+		height = max(ys) - self.min_y if n else 0
 		
-		# génération des solutions restantes: copie de l'originale et ordonnancement aléatoire
-		for _ in range(4 * Population.SIZE):
-			s = basic_solution.clone()
-			s.randomize()
-			self.solutions.append(s)
+		# taille des cellules (carrées) pour environ CELL_CITIES villes par cellule
+		if width > 0 and height > 0:
+			self.cell_size = math.sqrt(width * height * SpatialGrid.CELL_CITIES / n)
+		else:
+			self.cell_size = max(width, height, 1) * SpatialGrid.CELL_CITIES / max(n, 1)
 		
-		# tri initial
-		self.order_by_distance_and_shrink()
-						
-	def order_by_distance_and_shrink(self):
-		''' tri de la population par distance, de la plus courte à la plus longue, et limite sa taille '''
+		self.cols = int(width / self.cell_size) + 1
+		self.rows = int(height / self.cell_size) + 1
 		
-		self.solutions.sort(key=Solution.distance)
+		self.cells = [[] for _ in range(self.cols * self.rows)]
+		self.city_cell = array('i', bytes(4 * n))	# cellule de chaque ville
 		
-		# limite la taille de la population
-		self.solutions = self.solutions[:Population.SIZE]
+		for i in range(n):
+			c = self.cell(xs[i], ys[i])
+			self.cells[c].append(i)
+			self.city_cell[i] = c
+			
+	def cell(self, x, y):
+		''' indice de la cellule contenant la position x;y (bornée à la grille) '''
 		
-	def update(self):
-		''' mise à jour de la population par sélection, croisement et mutation '''
+		cx = min(max(int((x - self.min_x) / self.cell_size), 0), self.cols - 1)
+		cy = min(max(int((y - self.min_y) / self.cell_size), 0), self.rows - 1)
 		
-		# sélection des élites
-		elite_rate = Population.ELITE_RATE
-		elite = max(int(Population.SIZE * elite_rate), 1)
-				
-		new_solutions = self.solutions[:elite]
+		return cy * self.cols + cx
+	
+	def search(self, x, y, k, cells=None, exclude=-1):
+		''' 
+			Retourne les k villes les plus proches de la position x;y, sous forme de couples (distance, ville) triés
+			cells permet de chercher dans une copie de la grille dont des villes ont été retirées
+		'''
 		
-		# création de la nouvelle population par croisement (selon taux) de l'ancienne population
-		# la sélection dans l'ancienne population se fait par roulette
+		# aucun voisin demandé (p.ex. problème d'une seule ville)
+		if k <= 0:
+			return []
+		
+		cells = self.cells if cells is None else cells
+		xs, ys = self.xs, self.ys
+		hypot = math.hypot
+		cols, rows = self.cols, self.rows
 		
-		used = []
+		c = self.cell(x, y)
+		cx, cy = c % cols, c // cols
 		
-		while len(new_solutions) <= Population.SIZE:
-			a = self.roulette_selection()
-			b = self.roulette_selection()
+		best = []	# tas des k meilleurs, distances négatives
+		r = 0
+		
+		while True:
+			# cellules de la couronne r autour de cx;cy
+			for gy in range(max(cy - r, 0), min(cy + r, rows - 1) + 1):
+				if gy == cy - r or gy == cy + r:
+					gxs = range(max(cx - r, 0), min(cx + r, cols - 1) + 1)
+				else:
+					gxs = [gx for gx in (cx - r, cx + r) if 0 <= gx < cols]
+				
+				for gx in gxs:
+					for j in cells[gy * cols + gx]:
+						if j == exclude:
+							continue
+						
+						d = hypot(xs[j] - x, ys[j] - y)
+						
+						if len(best) < k:
+							heapq.heappush(best, (-d, j))
+						elif d < -best[0][0]:
+							heapq.heapreplace(best, (-d, j))
 			
-			used.append(a)
-			used.append(b)
-
-			# force le croisement si la sélection par roulette donne une solution déjà utilisée
-			force = a in used or b in used
+			# les couronnes suivantes sont au moins à r cellules de distance
+			if len(best) == k and r * self.cell_size >= -best[0][0]:
+				break
+			if r > cols and r > rows:
+				break
 			
-			#child1, child2 = a.crossover_ox(b, force)
-			child1 = a.crossover_greedy(b, force)
-			child2 = b.crossover_greedy(a, force)
-						
-			new_solutions.append(child1)
-			new_solutions.append(child2)
-				
-		# mutation dans la population (selon taux)
-		for s in new_solutions[1:]: # ne mute pas l'élite n° 1
-			s.mutate_swap()
-
-		# mise à jour de la population
-		self.solutions = new_solutions
-		self.order_by_distance_and_shrink()
+			r += 1
+			
+		return sorted([(-d, j) for d, j in best])
+	
+	def knn(self, i, k):
+		''' retourne les k plus proches voisins de la ville i, du plus proche au plus lointain '''
+		return array('i', [j for _, j in self.search(self.xs[i], self.ys[i], k, exclude=i)])
+	
+	def nearest_neighbor_tour(self, start):
+		''' construit un chemin en allant toujours à la ville non visitée la plus proche, depuis la ville start '''
+		
+		cells = [list(c) for c in self.cells]	# villes non visitées
+		
+		tour = array('i', [start])
+		cells[self.city_cell[start]].remove(start)
+		
+		current = start
+		
+		for _ in range(self.size - 1):
+			current = self.search(self.xs[current], self.ys[current], 1, cells)[0][1]
+			cells[self.city_cell[current]].remove(current)
+			tour.append(current)
+			
+		return tour
 	
-	def roulette_selection(self):
-		''' sélection aléatoire par roulette d'une solution, les solutions les plus courtes ayant le plus de probabilité d'être choisie '''
+	def greedy_tour(self, neighbors=GREEDY_NEIGHBORS):
+		''' 
+			Construit un chemin par l'heuristique gloutonne sur les arêtes: les arêtes candidates (plus proches voisins)
+			sont ajoutées de la plus courte à la plus longue si elles ne créent ni sommet de degré 3 ni cycle
+			Les fragments obtenus sont ensuite reliés par plus proche extrémité libre
+		'''
+		
+		n = self.size
+		
+		if n < 3:
+			return array('i', range(n))
+		
+		# arêtes candidates vers les plus proches voisins, triées par longueur
+		edges = []
+		for i in range(n):
+			for d, j in self.search(self.xs[i], self.ys[i], min(neighbors, n - 1), exclude=i):
+				if i < j:
+					edges.append((d, i, j))
+		edges.sort()
+		
+		degree = bytearray(n)
+		adjacent = [[] for _ in range(n)]
+		parent = array('i', range(n))	# union-find des fragments
+		
+		def find(i):
+			while parent[i] != i:
+				parent[i] = parent[parent[i]]
+				i = parent[i]
+			return i
 		
-		# distance minimum, utilisée comme référence pour la somme utilisée par la roulette
-		min_dist = self.solutions[0].distance()
+		for _, i, j in edges:
+			if degree[i] < 2 and degree[j] < 2:
+				ri, rj = find(i), find(j)
+				if ri != rj:
+					parent[ri] = rj
+					degree[i] += 1
+					degree[j] += 1
+					adjacent[i].append(j)
+					adjacent[j].append(i)
 		
-		# calcul de la somme
-		s = 0
-		for c in self.solutions:
-			s += min_dist / c.distance()
+		# extrémités des fragments (les villes isolées sont des fragments d'une seule ville)
+		cells = [[i for i in c if degree[i] < 2] for c in self.cells]
 		
-		# choix nb aléatoire
-		r = random.uniform(0, s)
+		def walk(end):
+			''' parcourt le fragment depuis l'extrémité end, retourne ses villes '''
+			path = [end]
+			previous, current = -1, end
+			while True:
+				following = [j for j in adjacent[current] if j != previous]
+				if not following:
+					return path
+				previous, current = current, following[0]
+				path.append(current)
 		
-		# recherche de la sélection selon nb aléatoire
-		s = 0
-		selection = self.solutions[0]
+		tour = array('i')
+		end = next(i for i in range(n) if degree[i] < 2)
 		
-		for c in self.solutions:		
-			s += min_dist / c.distance()
+		while True:
+			path = walk(end)
+			tour.extend(path)
 			
-			if s >= r:
-				selection = c
-				break
+			for e in (path[0], path[-1]):
+				if e in cells[self.city_cell[e]]:
+					cells[self.city_cell[e]].remove(e)
 			
-		return selection
-
-	def __repr__(self):
-		return str(self.solutions)
+			if len(tour) == n:
+				return tour
+			
+			end = self.search(self.xs[path[-1]], self.ys[path[-1]], 1, cells)[0][1]
 
 
-class Solution():
+class LocalSearch():
 	'''
-		Classe représentant une solution de chemin entre des villes
-		La solution mute et se croise avec une autre pour produire des enfants, selon des taux respectifs
-		La mutation échange aléatoirement deux villes dans le chemin
-		Le croisement effectue un Greedy Subtour Crossover (GSX), issu du document arob98.pdf
-		Le croisement OX (document GA.pdf) a aussi été implémenté dans un premier temps
-		La distance calculée de la solution est gardée en mémoire après un calcul (reset en cas de changement, mutation)
+		Recherche locale 2-opt et Or-opt appliquée aux solutions (étape mémétique)
+		Les mouvements candidats sont limités aux k plus proches voisins de chaque ville, donnés par l'index spatial
+		Des bits "don't look" (file des villes actives) évitent de réexaminer les villes sans amélioration possible,
+			chaque passe est ainsi proche d'un temps linéaire
+		Un mouvement Or-opt (déplacement de 1 à 3 villes consécutives) est réalisé par une suite de mouvements 2-opt
 	'''
 	
-	# Taux de mutation en pourcent
-	# Plus efficace avec de petits taux, sinon cela créé des instabilités
-	MUTATION_RATE = 10
+	# Nombre de plus proches voisins candidats par ville
+	NEIGHBORS = 8
 	
-	# Taux de croiseement en pourcent
-	# Plus efficace avec un grand taux, sinon cela créé de la stagnation
-	CROSSOVER_RATE = 75
+	# Longueur maximum des segments déplacés par Or-opt
+	OR_OPT_LENGTH = 3
 	
-	# Nombre d'essais maximum de mutation par swap pour trouver une distance de chemin résultante plus courte
-	MUTATION_RANDOM_TRY = 25
-
-	def __init__(self, cities):
-		''' initialisation de la solution '''
-		
-		self.cities = cities
-		self._distance = None	# distance interne stockée après calcul
-				
-	def mutate_swap(self):
-		''' 
-			Effectue une mutation de la solution (swap selon taux) en échangeant deux villes dans le chemin 
-			Ajoute une légère intelligence en essayant de trouver une mutation qui diminue la distance totale de chemin
-		'''
-
-		# taux de mutation
-		if random.randint(0, 100) > Solution.MUTATION_RATE:
-			return self
+	# Nombre minimum de villes pour appliquer la recherche locale
+	MIN_CITIES = 8
+	
+	# Gain minimum d'un mouvement, évite les boucles dues aux erreurs d'arrondi
+	EPSYLON = 1e-9
+	
+	def __init__(self, distances, grid, neighbors=NEIGHBORS):
+		''' prépare les listes des plus proches voisins de chaque ville à partir de l'index spatial '''
 		
-		old_distance = self.distance()
+		self.distances = distances
 		
-		# échange de 2 villes, en essayant de trouver une nouvelle distance totale plus courte que l'ancienne
-		i = 0
-		while True:
-			ind1, ind2 = self.random_index()
-			self.cities[ind1], self.cities[ind2] = self.cities[ind2], self.cities[ind1]
-			
-			self._distance = None # reset distance
+		k = min(neighbors, distances.size - 1)
+		self.neighbors = [grid.knn(i, k) for i in range(distances.size)]
 			
-			# condition de fin de mutation: distance + courte ou trop d'essai
-			if self.distance() < old_distance or i >= Solution.MUTATION_RANDOM_TRY:
-				break
-			
-			else:
-				self.cities[ind1], self.cities[ind2] = self.cities[ind2], self.cities[ind1]
-				i += 1
-
-		self._distance = None # reset distance stockée
+	def improve(self, solution, deadline=None, max_checks=None):
+		''' 
+			Améliore la solution par 2-opt et Or-opt jusqu'à un optimum local, jusqu'au temps limite (deadline)
+			ou jusqu'à max_checks villes examinées; le nombre de villes examinées est gardé dans l'attribut checks
+			La distance stockée de la solution est mise à jour par différence
+			@return: True si l'optimum local est atteint
+		'''
 		
-		return self
+		tour = solution.tour
+		n = len(tour)
 		
-	def crossover_greedy(self, solution2, force=False):
-		''' effectue un croisement selon l'algorithme Greedy Subtour Crossover (GSX) et taux '''
+		self.checks = 0
 		
-		# taux de croisement
-		if not force and random.randint(0, 100) > Solution.CROSSOVER_RATE:
-			return self.clone()
-
-		fa = True
-		fb = True
+		if n < LocalSearch.MIN_CITIES:
+			solution.local_optimum = True
+			return True
 		
-		t = random.choice(self.cities)	# ville
+		solution.distance()
 		
-		x = self.cities.index(t)
-		y = solution2.cities.index(t)
+		self.tour = tour
+		self.pos = array('i', bytes(4 * n))	# position de chaque ville dans le chemin
+		for i, c in enumerate(tour):
+			self.pos[c] = i
 		
-		g = [t]		# nouveau chemin de la solution croisée
+		# file des villes actives (bits "don't look" à 0)
+		active = deque(tour)
+		queued = bytearray(b'\x01') * n
 		
-		n = len(self.cities)
+		checks = 0
 		
-		# croisement
-		while fa == True or fb == True:
-			x = (x - 1) % n
-			y = (y + 1) % n
+		while active:
+			if checks == max_checks:
+				return False
 			
-			if fa == True:
-				if self.cities[x] not in g:
-					g.insert(0, self.cities[x])
-				else:
-					fa = False
-					
-			if fb == True:
-				if solution2.cities[y] not in g:
-					g.append(solution2.cities[y])
-				else:
-					fb = False
-					
-		# complétion
-		if len(g) < len(self.cities):
-			l = list(self.cities)
-			random.shuffle(l)
+			# vérification du temps limite de temps en temps seulement
+			checks += 1
+			self.checks = checks
+			if deadline is not None and checks % 64 == 0 and time.perf_counter() >= deadline:
+				return False
 			
-			for c in l:
-				if c not in g:
-					g.append(c)
-					
-		# solution issue du croisement
-		return Solution(g)
-	
-	def crossover_ox(self, solution2, force=False):
-		''' effectue un croisement OX entre la solution courante et la solution2, génèrant deux fils '''
-		
-		# taux
-		if not force and random.randint(0, 100) > Solution.CROSSOVER_RATE:
-			return self.clone(), solution2.clone()
+			a = active.popleft()
+			queued[a] = 0
+			
+			delta, touched = self.two_opt(a)
+			if not delta:
+				delta, touched = self.or_opt(a)
 				
-		length = len(self.cities)
-		ind_max = length - 1
-		length_cross = math.floor(ind_max / 2)	# longueur de la moitié de longueur de solution
-		# indices début/fin du croisement
-		ind_start = random.randint(1, ind_max - length_cross)
-		ind_stop = ind_start + length_cross - 1
-		
-		# croisement des enfants pour la partie début->fin
-		new_cities1 = [None for _ in self.cities]
-		new_cities2 = [None for _ in self.cities]
+			if delta:
+				solution._distance += delta
+				
+				for c in touched:
+					if not queued[c]:
+						queued[c] = 1
+						active.append(c)
 		
-		for i in range(ind_start, ind_stop + 1):
-			new_cities1[i] = solution2.cities[i]
-			new_cities2[i] = self.cities[i]
-			
-		# complétion du reste des enfants et solutions
-		self._crossover_ox(solution2, new_cities1, ind_stop, length)
-		self._crossover_ox(self, new_cities2, ind_stop, length)
-
-		return Solution(new_cities1), Solution(new_cities2)
+		solution.local_optimum = True
+		return True
 	
-	def _crossover_ox(self, solution, new_cities, ind_stop, length):
-		''' implémentation du croisement OX entre une solution et le fils généré en partie '''
+	def two_opt(self, a):
+		''' cherche et applique un mouvement 2-opt améliorant touchant la ville a, retourne (gain, villes touchées) '''
 		
-		j = ind_stop + 1
-		for i in range(j, ind_stop + length):
-			city = solution.cities[i % length]
+		dist = self.distances.dist
+		tour, pos = self.tour, self.pos
+		n = len(tour)
+		
+		for forward in (True, False):
+			b = tour[(pos[a] + 1) % n] if forward else tour[pos[a] - 1]
+			dab = dist(a, b)
 			
-			if new_cities[j % length] is None and city not in new_cities:
-				new_cities[j % length] = city
-				j += 1
+			for c in self.neighbors[a]:
+				dac = dist(a, c)
+				if dac >= dab:
+					break
 				
-	def clone(self):
-		''' copie profonde d'une solution '''
-		return Solution(list(self.cities))
-
-	def randomize(self):
-		''' réorganisation aléatoire des villes de la solution '''
-		random.shuffle(self.cities)
-
-	def distance(self):
-		''' calcule la distance totale du chemin représenté par la solution ''' 
+				d = tour[(pos[c] + 1) % n] if forward else tour[pos[c] - 1]
+				if c == b or d == a:
+					continue
+				
+				delta = dac + dist(b, d) - dab - dist(c, d)
+				
+				if delta < -LocalSearch.EPSYLON:
+					# arêtes (a,b),(c,d) remplacées par (a,c),(b,d)
+					if forward:
+						self.move(a, b, c, d)
+					else:
+						self.move(b, a, d, c)
+					return delta, (a, b, c, d)
+				
+		return 0, ()
+	
+	def or_opt(self, a):
+		''' cherche et applique un déplacement Or-opt améliorant du segment commençant en a, retourne (gain, villes touchées) '''
 		
-		# calcul de la distance si non effectué
-		if self._distance is None:
-			distance = 0.0
+		dist = self.distances.dist
+		tour, pos = self.tour, self.pos
+		n = len(tour)
+		
+		for length in range(1, LocalSearch.OR_OPT_LENGTH + 1):
+			# segment s1..s2 entre p et q
+			i = pos[a]
+			s1, s2 = a, tour[(i + length - 1) % n]
+			p, q = tour[i - 1], tour[(i + length) % n]
+			segment = {tour[(i + k) % n] for k in range(length)}
 			
-			old_city = self.cities[-1]
+			removal = dist(p, s1) + dist(s2, q) - dist(p, q)
 			
-			for city in self.cities:
-				distance += self.distance_euclidean(city, old_city)
-				old_city = city
+			for c in self.neighbors[s1]:
+				dsc = dist(s1, c)
+				if dsc >= removal:
+					break
+				if c in segment:
+					continue
 				
-			self._distance = distance
-
-		return self._distance
-
-	def distance_euclidean(self, city1, city2):
-		''' calcule la distance entre 2 villes de la solution '''
-		return math.hypot(city1.x - city2.x, city1.y - city2.y)
+				# insertion entre c et son suivant (c,s1..s2,y) ou entre son précédent et c (x,s2..s1,c)
+				y = tour[(pos[c] + 1) % n]
+				x = tour[pos[c] - 1]
+				
+				if y not in segment:
+					delta = dsc + dist(s2, y) - dist(c, y) - removal
+					if delta < -LocalSearch.EPSYLON:
+						self.move_segment(p, s1, s2, q, c, y, False)
+						return delta, (p, q, s1, s2, c, y)
+					
+				if x not in segment:
+					delta = dsc + dist(x, s2) - dist(x, c) - removal
+					if delta < -LocalSearch.EPSYLON:
+						self.move_segment(p, s1, s2, q, x, c, True)
+						return delta, (p, q, s1, s2, x, c)
+				
+		return 0, ()
+	
+	def move(self, a, b, c, d):
+		''' 
+			Mouvement 2-opt: remplace les arêtes (a,b),(c,d) par (a,c),(b,d), avec b suivant a et d suivant c
+			dans un sens de parcours ou dans l'autre; le plus court des deux chemins est inversé
+		'''
 		
-	def random_index(self):
-		''' retourne deux indices aléatoires dans la liste des villes '''
+		tour, pos = self.tour, self.pos
+		n = len(tour)
 		
-		ind = len(self.cities) - 1
-		a, b = 0, 0
+		# sens de parcours inversé par un mouvement précédent
+		if tour[(pos[a] + 1) % n] != b:
+			a, b, c, d = d, c, b, a
+			
+		# inversion du chemin b..c, ou du chemin complémentaire d..a s'il est plus court
+		i, j = pos[b], pos[c]
+		length = (j - i) % n + 1
 		
-		while a == b:
-			a = random.randint(0, ind)
-			b = random.randint(0, ind)
+		if 2 * length > n:
+			i, j = pos[d], pos[a]
+			length = n - length
 			
-		return a, b
-
-	def __repr__(self):
-		return str(self.cities)
+		for _ in range(length // 2):
+			ci, cj = tour[i], tour[j]
+			tour[i], tour[j] = cj, ci
+			pos[cj], pos[ci] = i, j
+			i = (i + 1) % n
+			j = (j - 1) % n
+	
+	def move_segment(self, p, s1, s2, q, x, y, reverse):
+		''' 
+			Mouvement Or-opt: déplace le segment s1..s2 (entre p et q) entre x et y, à l'envers si reverse
+			Réalisé par deux ou trois mouvements 2-opt
+		'''
+		
+		self.move(p, s1, x, y)		# (p,x),(s1,y)
+		self.move(p, x, q, s2)		# (p,q),(x,s2)
+		
+		if not reverse:
+			self.move(x, s2, s1, y)	# (x,s1),(s2,y)
 
 
 class Parser():
 	''' 
 		Classe effectuant la lecture d'une liste de villes 
+		Le fichier est lu et découpé en une fois, les positions sont stockées dans des tableaux contigus (xs, ys)
+		Pour les grands fichiers, un cache binaire est écrit à côté du fichier texte et relu directement aux lancements suivants
+		Les objets City ne sont créés qu'à la demande (attribut cities): PVC travaille directement sur les tableaux
+		Les fichiers TSPLIB (.tsp, section NODE_COORD_SECTION) sont aussi acceptés, les villes étant nommées par leur numéro
 	'''
 	
-	def __init__(self, path):
-		''' lit le fichier path ligne par ligne et créé les villes avec leurs noms et leurs positions x;y '''
+	# Extension des fichiers au format TSPLIB
+	TSPLIB_SUFFIX = '.tsp'
+	
+	# Extension du cache binaire, ajoutée au nom du fichier texte
+	CACHE_SUFFIX = '.cache'
+	
+	# Nombre de villes minimum pour écrire un cache, les petits fichiers sont relus plus vite qu'ils ne sont vérifiés
+	CACHE_MIN_CITIES = 10000
+	
+	# Signature du format de cache: nombre de villes, taille et date du fichier texte, puis xs, ys et noms
+	CACHE_MAGIC = b'PVC1'
+	CACHE_HEADER = struct.Struct('<4sQQd')
+	
+	def __init__(self, path, cache=True):
+		''' lit le fichier path (ou son cache) et stocke les noms des villes et leurs positions x;y '''
 		self.path = path
 		
-		self.cities = []
+		self._cities = None
+		
+		if not (cache and self.read_cache()):
+			if path.lower().endswith(Parser.TSPLIB_SUFFIX):
+				self.read_tsplib()
+			else:
+				self.read_text()
+			
+			if cache and len(self.names) >= Parser.CACHE_MIN_CITIES:
+				self.write_cache()
+	
+	@property
+	def cities(self):
+		''' villes lues, créées à la première demande '''
+		
+		if self._cities is None:
+			self._cities = _make_cities(self.names, self.xs, self.ys)
+			
+		return self._cities
+	
+	def read_text(self):
+		''' lit le fichier texte: une ville par ligne, "nom x y" '''
+		
+		with open(self.path, 'rb') as file:
+			tokens = file.read().split()
+		
+		if len(tokens) % 3 != 0:
+			raise ValueError("Fichier de villes invalide: %s" % self.path)
+		
+		self.names = [name.decode() for name in tokens[0::3]]
+		self.xs = array('d', map(float, tokens[1::3]))
+		self.ys = array('d', map(float, tokens[2::3]))
+	
+	def read_tsplib(self):
+		''' lit un fichier TSPLIB: entête "CLE : valeur", puis NODE_COORD_SECTION avec une ville par ligne "numéro x y" '''
+		
+		with open(self.path, 'rb') as file:
+			data = file.read()
+		
+		header, section, body = data.partition(b'NODE_COORD_SECTION')
+		
+		if not section:
+			raise ValueError("Fichier TSPLIB sans coordonnées (NODE_COORD_SECTION): %s" % self.path)
+		
+		fields = dict(line.partition(b':')[::2] for line in header.splitlines() if b':' in line)
+		fields = {k.strip().upper(): v.strip() for k, v in fields.items()}
+		
+		if fields.get(b'TYPE', b'TSP').split()[0] != b'TSP':
+			raise ValueError("Type TSPLIB non supporté (%s): %s" % (fields[b'TYPE'].decode(), self.path))
+		
+		tokens = body.split()
+		
+		# fin de la section: EOF ou section suivante
+		for i in range(0, len(tokens), 3):
+			if not tokens[i][:1].isdigit():
+				del tokens[i:]
+				break
+		
+		if len(tokens) % 3 != 0 or (b'DIMENSION' in fields and int(fields[b'DIMENSION']) != len(tokens) // 3):
+			raise ValueError("Fichier TSPLIB invalide: %s" % self.path)
+		
+		self.names = [name.decode() for name in tokens[0::3]]
+		self.xs = array('d', map(float, tokens[1::3]))
+		self.ys = array('d', map(float, tokens[2::3]))
+		
+	def cache_path(self):
+		''' chemin du cache binaire associé au fichier texte '''
+		return self.path + Parser.CACHE_SUFFIX
+	
+	def read_cache(self):
+		''' lit le cache binaire s'il existe et correspond au fichier texte, retourne True en cas de succès '''
 		
-		with open(path) as file:
+		try:
+			stat = os.stat(self.path)
 			
-			for line in file:
-				name, x, y = line.split()
-				self.cities.append(City(name, int(x), int(y)))
+			with open(self.cache_path(), 'rb') as file:
+				magic, n, size, mtime = Parser.CACHE_HEADER.unpack(file.read(Parser.CACHE_HEADER.size))
+				
+				if magic != Parser.CACHE_MAGIC or size != stat.st_size or mtime != stat.st_mtime:
+					return False
+				
+				self.xs = array('d')
+				self.xs.fromfile(file, n)
+				self.ys = array('d')
+				self.ys.fromfile(file, n)
+				self.names = file.read().decode().split('\n') if n else []
+				
+		except (OSError, EOFError, struct.error):
+			return False
+		
+		return len(self.names) == n
+	
+	def write_cache(self):
+		''' écrit le cache binaire (fichier temporaire renommé), ignoré si le répertoire n'est pas accessible en écriture '''
+		
+		stat = os.stat(self.path)
+		tmp = self.cache_path() + '.tmp'
+		
+		try:
+			with open(tmp, 'wb') as file:
+				file.write(Parser.CACHE_HEADER.pack(Parser.CACHE_MAGIC, len(self.names), stat.st_size, stat.st_mtime))
+				self.xs.tofile(file)
+				self.ys.tofile(file)
+				file.write('\n'.join(self.names).encode())
+				
+			os.replace(tmp, self.cache_path())
+		except OSError:
+			pass
+
+
+def _number(v):
+	''' coordonnée entière si possible, sinon flottante '''
+	return int(v) if v.is_integer() else v
+
+
+def _make_cities(names, xs, ys):
+	''' crée les objets City à partir des tableaux de noms et de coordonnées '''
+	return [City(name, _number(x), _number(y)) for name, x, y in zip(names, xs, ys)]
 
 
 class City():
@@ -466,6 +2687,8 @@ class City():
 		Classe représentant une ville, avec son nom et sa position (X,Y)
 	'''
 	
+	__slots__ = ('name', 'x', 'y')
+	
 	def __init__(self, name, x, y):
 		''' création d'une ville avec un nom et une position x;y '''
 		self.name = name
@@ -488,13 +2711,18 @@ class Gui():
 		Classe gérant l'interface graphique, avec dessin des villes, ajout de villes par clic et résolution du PVC
 		Reçoit un objet PVC en paramètres, avec une possible liste de villes chargées depuis un fichier
 		Lors de la résolution du PVC, le meilleur chemin reliant les villes est dessiné
+		Les villes et leurs noms sont dessinés une seule fois sur une surface en cache, seul le chemin est redessiné
+		La résolution tourne dans un thread séparé, l'affichage étant limité à FPS images par seconde
 	'''
 	
+	# Nombre maximum d'images par seconde pendant la résolution
+	FPS = 30
+	
 	def __init__(self, pvc):		
 		''' initialise la GUI, l'affiche, attend l'ajout de villes par l'utilisateur et effectue le calcul du PVC '''
 		
 		self.pvc = pvc
-		self.display_path = False	# affichage du meilleur chemin
+		self.snapshot = None		# dernier état de la résolution, à afficher
 		
 		screen_x = 500
 		screen_y = 500
@@ -510,7 +2738,13 @@ class Gui():
 		
 		self.screen = pygame.display.get_surface() 
 		self.font = pygame.font.Font(None,30)
-		self.font_cities = pygame.font.Font(None,18)		
+		self.font_cities = pygame.font.Font(None,18)
+		
+		# couche statique: fond et villes
+		self.background = pygame.Surface((screen_x, screen_y))
+		
+		for c in self.pvc.cities:
+			self.draw_city(c)
 
 		self.draw()
 		
@@ -524,54 +2758,98 @@ class Gui():
 				elif event.type == KEYDOWN and event.key == K_RETURN:
 					collecting = False
 				elif event.type == MOUSEBUTTONDOWN:
-					pos = pygame.mouse.get_pos()
-					self.pvc.ordered_cities.append(City("v%i" % len(self.pvc.ordered_cities), pos[0], pos[1]))
+					self.add_city(pygame.mouse.get_pos())
 					self.draw()
 		
 		# calcul du PVC
-		self.display_path = True
-		pvc.compute(self)
+		self.solve()
 		
-		# attente finale
+		# attente finale: un clic ajoute une ville et relance la résolution à partir de la population courante
 		while True:
 			event = pygame.event.wait()
 			if event.type == KEYDOWN or event.type == QUIT: break
+			elif event.type == MOUSEBUTTONDOWN:
+				self.add_city(pygame.mouse.get_pos())
+				self.solve()
+	
+	def add_city(self, pos):
+		''' ajoute une ville au PVC à la position donnée et la dessine sur la couche statique '''
+		
+		city = City("v%i" % len(self.pvc.cities), pos[0], pos[1])
+		self.pvc.add_city(city)
+		self.draw_city(city)
+	
+	def draw_city(self, c):
+		''' dessine une ville et son nom sur la couche statique '''
+		
+		pygame.draw.circle(self.background, self.city_color, c.pos(), self.city_radius)
+		
+		label = self.font_cities.render("%s (%i,%i)" % (c.name, c.x, c.y), True, self.city_color)
+		label_rect = label.get_rect()
+		label_rect.centerx = c.x + label_rect.width / 1.6
+		label_rect.centery = c.y
+		self.background.blit(label, label_rect)
+	
+	def solve(self):
+		''' résoud le PVC dans un thread séparé en affichant sa progression au plus FPS fois par seconde '''
+		
+		solver = threading.Thread(target=self.run_solver)
+		solver.start()
+		
+		clock = pygame.time.Clock()
+		
+		while solver.is_alive():
+			# prévenir le freeze de la GUI
+			for event in pygame.event.get():
+				if event.type == QUIT:
+					self.pvc.cancel()
+					solver.join()
+					exit(0)
+			
+			self.draw()
+			clock.tick(Gui.FPS)
+		
+		solver.join()
+		self.draw()
+	
+	def run_solver(self):
+		''' calcul du PVC, en gardant le dernier état pour l'affichage '''
+		
+		for snapshot in self.pvc.iterate(1 / Gui.FPS):
+			self.snapshot = snapshot
 
 	def draw(self):
 		''' dessine les villes dans la GUI et le meilleur chemin calculé lors du calcul PVC '''
 		
-		# prévenir le freeze de la GUI
-		for event in pygame.event.get():
-			if event.type == QUIT:
-				exit(0)
-
-		self.screen.fill(0)
+		self.screen.blit(self.background, (0, 0))
 		
-		# dessin des villes
-		for c in self.pvc.ordered_cities:
-			pygame.draw.circle(self.screen, self.city_color, c.pos(), self.city_radius)
-			
-			label = self.font_cities.render("%s (%i,%i)" % (c.name, c.x, c.y), True, self.city_color)
-			label_rect = label.get_rect()
-			label_rect.centerx = c.x + label_rect.width / 1.6
-			label_rect.centery = c.y
-			self.screen.blit(label, label_rect)
+		snapshot = self.snapshot
+		
+		if snapshot is not None:
+			distance, total_time = snapshot.distance, snapshot.elapsed
+		else:
+			distance, total_time = self.pvc.total_distance, self.pvc.total_time
 		
 		# dessin du titre : info sur les villes et le calcul PVC
-		text = self.font.render("Nombre: %i Distance: %.3f Temps: %.3f" %(len(self.pvc.ordered_cities), self.pvc.total_distance, self.pvc.total_time), True, self.title_color)
+		text = self.font.render("Nombre: %i Distance: %.3f Temps: %.3f" %(len(self.pvc.cities), distance, total_time), True, self.title_color)
 		textRect = text.get_rect()
 		self.screen.blit(text, textRect)
 			
 		# affichage du meilleur chemin calculé
-		if self.display_path:
-			pygame.draw.lines(self.screen, self.city_color, True, [c.pos() for c in self.pvc.ordered_cities])
+		if snapshot is not None and len(snapshot.tour) > 1:
+			cities = self.pvc.cities
+			pygame.draw.lines(self.screen, self.city_color, True, [cities[i].pos() for i in snapshot.tour])
 			
 		pygame.display.flip()
 
 if __name__ == '__main__':
 	'''
 		Programme principal exécutable en ligne de commande avec les paramètres suivants:
-			DeruazRosser.py [--nogui] [--maxtime s] [filename]
+			DeruazRosser.py [--nogui] [--maxtime s] [--crossover {gsx,ox,pmx,erx}] [--selection {roulette,tournament,rank}]
+				[--force-crossover {reuse,always,never}] [--workers n] [--eval-workers n] [--local-search rate]
+				[--patience k] [--target distance] [--generations n] [--population-size n]
+				[--model {generational,steady}] [--elite-rate r] [--crossover-rate p] [--mutation-rate p] [--mutation-tries n]
+				[--stagnation-size n] [--adaptive] [--seed s] [--profile FILE] [--batch SOURCE] [filename]
 		Parse les paramètres, exécute la résolution du PVC selon les paramètres et affiche les résultats
 	'''
 	
@@ -580,22 +2858,74 @@ if __name__ == '__main__':
 	
 	parser.add_argument('--nogui', action="store_true", help="Ne pas afficher l'interface graphique")
 	parser.add_argument('--maxtime', type=int, action="store", help="Arrêter la recherche après maxtime secondes")
-	parser.add_argument("filename", type=str, default=None, nargs="?", help="Fichier contenant les villes à visiter")
+	parser.add_argument('--crossover', choices=Solution.CROSSOVERS, default='gsx', help="Opérateur de croisement")
+	parser.add_argument('--selection', choices=Population.SELECTIONS, default='roulette', help="Méthode de sélection des parents")
+	parser.add_argument('--force-crossover', choices=Population.FORCE_CROSSOVER, default='reuse', help="Politique de croisement forcé")
+	parser.add_argument('--workers', type=int, default=1, help="Nombre d'îles évoluant en parallèle (0: une par coeur)")
+	parser.add_argument('--eval-workers', type=int, default=0, help="Nombre de processus d'évaluation pour les grands problèmes")
+	parser.add_argument('--local-search', type=float, default=0.25, help="Part du temps consacrée à la recherche locale (0: désactivée)")
+	parser.add_argument('--patience', type=int, default=0, help="Arrêter après k générations sans amélioration")
+	parser.add_argument('--target', type=float, default=0, help="Arrêter dès que la distance cible est atteinte")
+	parser.add_argument('--generations', type=int, default=0, help="Arrêter après n générations")
+	parser.add_argument('--population-size', type=int, default=0, help="Taille de la population (0: %d, ou selon N avec --adaptive)" % Population.SIZE)
+	parser.add_argument('--model', choices=Population.MODELS, default='generational', help="Modèle d'évolution de la population")
+	parser.add_argument('--elite-rate', type=float, default=Population.ELITE_RATE, help="Part d'élites gardées à chaque génération")
+	parser.add_argument('--crossover-rate', type=float, default=Solution.CROSSOVER_RATE, help="Taux de croisement en pourcent")
+	parser.add_argument('--mutation-rate', type=float, default=Solution.MUTATION_RATE, help="Taux de mutation en pourcent")
+	parser.add_argument('--mutation-tries', type=int, default=Solution.MUTATION_RANDOM_TRY, help="Essais maximum d'une mutation")
+	parser.add_argument('--stagnation-size', type=int, default=PVC.STAGNATION_SIZE, help="Fenêtre de la condition de stagnation")
+	parser.add_argument('--adaptive', action="store_true", help="Taille de population selon N et taux adaptés à la diversité")
+	parser.add_argument('--local-search-checks', type=float, default=0,
+			help="Budget de la recherche locale en villes examinées par ville et par génération (0: part du temps, cf --local-search)")
+	parser.add_argument('--seed', type=int, default=None, help="Graine du générateur aléatoire (résolution reproductible si limitée par --generations, sans îles, avec --local-search-checks ou sans recherche locale)")
+	parser.add_argument('--profile', metavar='FILE', default=None, help="Ecrire le temps par phase et les compteurs dans FILE (JSON)")
+	parser.add_argument('--batch', metavar='SOURCE', default=None,
+			help="Résoudre un lot d'instances (répertoire ou fichier JSONL) sur --workers processus, une ligne JSON par résultat")
+	parser.add_argument("filename", type=str, default=None, nargs="?", help="Fichier contenant les villes à visiter (texte ou TSPLIB .tsp)")
 
 	args = parser.parse_args()
 	
 	gui = not args.nogui
 	maxtime = args.maxtime if args.maxtime is not None else 0
 	file = args.filename
+	crossover = args.crossover
+	selection = args.selection
+	force_crossover = args.force_crossover
+	workers = args.workers
+	eval_workers = args.eval_workers
+	local_search = args.local_search
+	patience = args.patience
+	target = args.target
+	max_generations = args.generations
+	profile = args.profile
+	seed = args.seed
+	config = Config(args.population_size, args.model, args.elite_rate, args.crossover_rate, args.mutation_rate,
+			args.mutation_tries, args.stagnation_size, args.adaptive, args.local_search_checks)
+	
+	# résolution par lots: résultats écrits au fil des calculs, sans interface graphique
+	if args.batch is not None:
+		for result in ga_solve_batch(args.batch, maxtime, args.workers, seed, config,
+				crossover=crossover, selection=selection, force_crossover=force_crossover, local_search=local_search,
+				patience=patience, target=target, max_generations=max_generations):
+			print(json.dumps(result._asdict()), flush=True)
+		exit(0)
 	
 	print("Résolution du problème du voyageur du commerce - Vincent Déruaz, Mathieu Rosser")
 	print("Gui: %d"%gui)
 	print("Maxtime: %d"%maxtime)
 	print("File: %s" %file)
+	print("Crossover: %s" %crossover)
+	print("Selection: %s" %selection)
+	print("Force crossover: %s" %force_crossover)
+	print("Workers: %d" %workers)
+	print("Eval workers: %d" %eval_workers)
+	print("Local search: %.2f" %local_search)
+	print("Config: %r" %config)
 	print()
 
 	# résolution PVC
-	total_distance, cities = ga_solve(file, gui, maxtime)
+	total_distance, cities = ga_solve(file, gui, maxtime, crossover, selection, force_crossover, workers, eval_workers, local_search,
+			patience, target, max_generations, profile, seed, config)
 	
 	print("Distance totale:\n\t %d" %total_distance)
 	print("Villes à visiter dans l'ordre:\n\t %s" %str(cities))
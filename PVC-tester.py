@@ -6,6 +6,12 @@ pour le probl
 Permet de lancer automatiquement une srie de solveurs sur une srie de problmes
 et gnre une grille de rsultats au format CSV.
 
+Chaque test est rpt plusieurs fois avec des graines diffrentes, les excutions
+tournant en parallle sur les coeurs disponibles (un processus pingl par coeur).
+Les mesures (distance, gnrations par seconde, temps pour atteindre X% de la
+meilleure distance, mmoire maximum) sont crites en JSON/CSV et compares  une
+rfrence enregistre.
+
 v0.2, Matthieu Amiguet, HE-Arc
 v0.3, hatem Ghorbel, HE-Arc
 '''
@@ -40,12 +46,40 @@ tests = (
 # On tolre un dpassement de 5% du temps imparti:
 tolerance = 0.05
 
+# Tolrance relative entre la distance annonce et la distance recalcule
+dist_tolerance = 1e-6
+
 # Fichier dans lequel crire les rsultats
 import sys
 outfile = sys.stdout
 # ou :
 #outfile = open('results.csv', 'w')
 
+# Nombre d'excutions de chaque test, avec les graines seed, seed+1, ...
+repeats = 5
+seed = 1
+
+# Paramtres de l'algorithme passs aux solveurs qui les acceptent (cf DeruazRosser.Config),
+# p.ex. {'adaptive': True} ou {'population_size': 60, 'mutation_rate': 20}
+# ou {'local_search_checks': 3} pour un budget de recherche locale indpendant de la machine (mesures reproductibles)
+config = {}
+
+# Nombre de tests excuts en parallle (0: un par coeur disponible)
+processes = 0
+
+# carts  la meilleure distance connue pour lesquels on mesure le temps ncessaire (0.05: 5%)
+reach = (0.10, 0.05, 0.01)
+
+# Fichiers de mesures dtailles (None: pas d'criture)
+json_file = 'benchmark.json'
+csv_file = 'benchmark.csv'
+
+# Rfrence  laquelle comparer les mesures (p.ex. un benchmark.json renomm; None: pas de comparaison)
+baseline_file = 'baseline.json'
+
+# Seuil de la statistique t de Welch au-del duquel une diffrence de distance moyenne est signale
+significance = 2.0
+
 # affichage  la console d'informations d'avancement?
 verbose = False
 
@@ -57,11 +91,36 @@ gui = False
 # Cette partie n'a thoriquement pas  tre modifie
 
 import os
-from time import time
-from math import hypot
+import json
+import queue
+import random
+import statistics
+import multiprocessing
+from array import array
+from time import perf_counter
+from math import hypot, sqrt, isclose
+from importlib import import_module
+from DeruazRosser import Parser
+
+try:
+    import resource    # mmoire maximum des processus (Unix seulement)
+except ImportError:
+    resource = None
+
+try:
+    import numpy    # optionnel: calcul vectoris de la longueur du chemin
+except ImportError:
+    numpy = None
 
-def dist(xy1,xy2):	# x1,y1,x2,y2 -> ne peut recevoir un tuple (x,y),(x,y) ???
-    return hypot(xy2[0] - xy1[0],xy2[1] - xy1[1])
+def tour_length(xs, ys, tour):
+    '''Longueur du chemin ferm donn par les indices des villes'''
+    if numpy is not None:
+        x = numpy.asarray(xs)[tour]
+        y = numpy.asarray(ys)[tour]
+        return float(numpy.hypot(numpy.roll(x, -1) - x, numpy.roll(y, -1) - y).sum())
+    x = [xs[i] for i in tour]
+    y = [ys[i] for i in tour]
+    return sum(map(hypot, map(float.__sub__, x[1:] + x[:1], x), map(float.__sub__, y[1:] + y[:1], y)))
 
 def validate(filename, length, path, duration, maxtime):
     '''Validation de la solution
@@ -73,76 +132,285 @@ def validate(filename, length, path, duration, maxtime):
     if duration>maxtime * (1+tolerance):
         error += "Timeout (%.2f) " % (duration-maxtime)
     try:
-        cities = dict([(name, (int(x),int(y))) for name,x,y in [l.split() for l in open(filename)]])	# file(filename) ???
+        # mme chargeur que le solveur: lecture en bloc ou cache binaire
+        data = Parser(filename)
+        names = data.names
+        index = {name: i for i, name in enumerate(names)}
     except:
         return "(Validation failed...)"
-    tovisit = list(cities.keys()) # passage en list ???
+    
+    # permutation: chaque ville existe et n'apparat qu'une fois (bitmap des villes visites)
+    visited = bytearray(len(names))
+    tour = array('i')
+    complete = True
     
     try:
-        totaldist = 0
-        for (ci, cj) in zip(path, path[1:] +path[0:1]):
-            totaldist += dist(cities[ci],cities[cj])
-            tovisit.remove(ci)
-            
-        if int(totaldist) != int(length):
-            error += "Wrong dist! (%d instead of %d)" % (length, totaldist)
+        for ci in path:
+            i = index[ci]
+            if visited[i]:
+                error += "City %s appears twice in %r! " % (ci, path)
+                complete = False
+                break
+            visited[i] = 1
+            tour.append(i)
     except KeyError:
         error += "City %s does not exist! " % ci
-    except ValueError:
-        error += "City %s appears twice in %r! " % (ci, path)
+        complete = False
     except Exception as e:
         error += "Error during validation: %r" % e
+        complete = False
+    
+    if complete and tour:
+        totaldist = tour_length(data.xs, data.ys, tour)
+        if not isclose(totaldist, length, rel_tol=dist_tolerance):
+            error += "Wrong dist! (%d instead of %d)" % (length, totaldist)
     
-    if tovisit:
+    if len(tour) < len(names):
+        tovisit = [names[i] for i in range(len(names)) if not visited[i]]
         error += "Not all cities visited! %r" % tovisit
     
     return error
 
+def run(module, filename, maxtime, seed, check=False):
+    '''Excution d'un test par un solveur
+    
+    les solveurs offrant la rsolution pas  pas (PVC.iterate et Config) sont suivis au fil des gnrations,
+    les autres, ou tous si check est vrai, sont appels par l'interface officielle ga_solve
+    retourne la distance, le chemin, la dure, le nombre de gnrations (ou None),
+    la progression [(temps, distance), ...] et la mmoire maximum en ko (ou None)
+    '''
+    random.seed(seed)
+    m = import_module(module)
+    trace = []
+    generations = None
+    
+    start = perf_counter()
+    
+    if not check and hasattr(m, 'PVC') and hasattr(m.PVC, 'iterate') and hasattr(m, 'Config'):
+        # suivi de la progression par les tats de la rsolution
+        pvc = m.PVC(m.Parser(filename).cities, maxtime, seed=seed, config=m.Config(**config))
+        for snapshot in pvc.iterate(0):
+            if not trace or snapshot.distance < trace[-1][1]:
+                trace.append((snapshot.elapsed, snapshot.distance))
+        length = pvc.total_distance
+        path = [pvc.cities[i].name for i in pvc.tour]
+        generations = pvc.generations
+    else:
+        length, path = m.ga_solve(filename, gui, maxtime)
+    
+    duration = perf_counter() - start
+    memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    return length, path, duration, generations, trace, memory
 
+def worker(job, core, results):
+    '''Processus excutant un test, pingl sur un coeur'''
+    if core is not None:
+        os.sched_setaffinity(0, {core})
+    try:
+        result = run(*job)
+    except SystemExit:
+        result = "tried to quit!"
+    except Exception as e:
+        result = "%r" % e
+    results.put((job, core, result))
 
-if __name__ == '__main__':
-    # Rcupration des diffrentes implmentations
-    # On met les diffrentes fonctions ga_solve() dans un dictionnaire index par le nom du module correpsondant
-    # On en profite pour crire la ligne d'en-tte du fichier de sortie
+def benchmark(jobs):
+    '''Excution des tests en parallle, un processus par test et par coeur libre
+    
+    retourne un dictionnaire {test: rsultat} dans l'ordre de fin des tests
+    '''
+    if hasattr(os, 'sched_setaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = [None] * (os.cpu_count() or 1)
+    cores = cores[:processes or len(cores)]
+    
+    results = multiprocessing.Queue()
+    running = {}
+    done = {}
+    suspects = set()    # tests termins sans rsultat, dclars en erreur si aucun rsultat n'arrive ensuite
+    jobs = list(jobs)
+    
+    while jobs or running:
+        while jobs and cores:
+            job = jobs.pop(0)
+            core = cores.pop(0)
+            if verbose:
+                print("--> %s, %s, %d, seed %d%s" % (job[:4] + (" (ga_solve)" if job[4] else "",)))
+            p = multiprocessing.Process(target=worker, args=(job, core, results))
+            p.start()
+            running[job] = (p, core)
+        try:
+            job, core, result = results.get(timeout=0.5)
+        except queue.Empty:
+            # processus mort sans avoir envoy son rsultat (mmoire, segfault, os._exit...)
+            for job, (p, core) in list(running.items()):
+                if p.exitcode is None:
+                    continue
+                if job in suspects:
+                    running.pop(job)
+                    p.join()
+                    cores.append(core)
+                    done[job] = "worker died (exit code %s)" % p.exitcode
+                else:
+                    suspects.add(job)
+            continue
+        running.pop(job)[0].join()
+        cores.append(core)
+        done[job] = result
+    
+    return done
 
-    solvers = {}
+def time_to(trace, target):
+    '''Temps ncessaire pour atteindre la distance cible (None si jamais atteinte)'''
+    for elapsed, distance in trace:
+        if distance <= target:
+            return elapsed
+    return None
 
-    outfile.write('Test;')
+def welch(a, b):
+    '''Statistique t de Welch entre deux sries de distances (0 si non calculable)'''
+    if len(a) < 2 or len(b) < 2:
+        return 0.0
+    error = sqrt(statistics.variance(a) / len(a) + statistics.variance(b) / len(b))
+    if error == 0:
+        return 0.0
+    return (statistics.mean(a) - statistics.mean(b)) / error
 
+def summarize(records):
+    '''Statistiques par solveur et par test: distances, gnrations par seconde, temps pour atteindre X%, mmoire'''
+    best = {}
+    for r in records:
+        if not r['error']:
+            best[r['file']] = min(best.get(r['file'], r['length']), r['length'])
+    
+    summary = []
     for m in modules:
-        exec ("from %s import ga_solve" % m)
-        solvers[m] = ga_solve
-        outfile.write("%s;" % m)
+        for (filename, maxtime) in tests:
+            filename = os.path.normcase(os.path.normpath(filename))
+            runs = [r for r in records if (r['module'], r['file'], r['maxtime']) == (m, filename, maxtime) and not r['check']]
+            valid = [r for r in runs if not r['error']]
+            lengths = [r['length'] for r in valid]
+            s = {'module': m, 'file': filename, 'maxtime': maxtime, 'runs': len(runs), 'errors': len(runs) - len(valid),
+                'lengths': lengths}
+            if valid:
+                s['mean'] = statistics.mean(lengths)
+                s['stdev'] = statistics.stdev(lengths) if len(lengths) > 1 else 0.0
+                s['min'] = min(lengths)
+                s['median'] = statistics.median(lengths)
+                rates = [r['generations_per_second'] for r in valid if r['generations_per_second'] is not None]
+                s['generations_per_second'] = statistics.mean(rates) if rates else None
+                memory = [r['memory_kb'] for r in valid if r['memory_kb'] is not None]
+                s['memory_kb'] = max(memory) if memory else None
+                for x in reach:
+                    times = [time_to(r['trace'], best[filename] * (1 + x)) for r in valid if r['trace']]
+                    times = [t for t in times if t is not None]
+                    s['time_to_%g%%' % (100 * x)] = statistics.mean(times) if times else None
+                    s['reached_%g%%' % (100 * x)] = len(times)
+            summary.append(s)
+    return summary
 
-    outfile.write('\n')
+def compare(summary, baseline):
+    '''Comparaison des distances moyennes avec la rfrence; retourne les lignes  afficher'''
+    reference = {(s['module'], s['file'], s['maxtime']): s for s in baseline['summary']}
+    lines = []
+    for s in summary:
+        b = reference.get((s['module'], s['file'], s['maxtime']))
+        if b is None or 'mean' not in s or 'mean' not in b:
+            continue
+        t = welch(s['lengths'], b['lengths'])
+        delta = 100.0 * (s['mean'] - b['mean']) / b['mean']
+        if t > significance:
+            verdict = "REGRESSION"
+        elif t < -significance:
+            verdict = "improvement"
+        else:
+            verdict = "="
+        lines.append("%s %s (%ds): %.1f -> %.1f (%+.2f%%, t=%.2f) %s"
+            % (s['module'], s['file'], s['maxtime'], b['mean'], s['mean'], delta, t, verdict))
+    return lines
 
-    # Cette partie effectue les tests proprement dits
-    # et rapporte les rsultats dans outfile
+if __name__ == '__main__':
+    # Liste des excutions: chaque solveur, chaque test, chaque graine
+    # Les mmes graines sont utilises pour tous les solveurs
+    # Une excution de plus par ga_solve vrifie l'interface officielle (hors statistiques, erreurs dans la grille)
 
+    jobs = []
     for (filename, maxtime) in tests:
-        if verbose: 
-            print ("--> %s, %d" % (filename, maxtime))
         # normalisation du nom de fichier (pour l'aspect multi-plateforme)
         filename = os.path.normcase(os.path.normpath(filename))
-        # criture de l'en-tte de ligne
-        outfile.write("%s (%ds);" % (filename, maxtime))
-        # Appel des solveurs proprement dits, vrification et criture des rsultats
         for m in modules:
-            if verbose: 
-                print ("## %s" % m)
-            try:
-                start = time()
-                length, path = solvers[m](filename, gui, maxtime)
-                duration = time()-start
-            except Exception as e:
-                    outfile.write("%r;" % e)
-            except SystemExit:
-                outfile.write("tried to quit!;")
+            for k in range(repeats):
+                jobs.append((m, filename, maxtime, seed + k, False))
+            jobs.append((m, filename, maxtime, seed, True))
+
+    # Cette partie effectue les tests proprement dits, en parallle
+
+    done = benchmark(jobs)
+
+    # Vrification des rsultats
+
+    records = []
+    for job in jobs:
+        m, filename, maxtime, s, check = job
+        result = done[job]
+        r = {'module': m, 'file': filename, 'maxtime': maxtime, 'seed': s, 'check': check}
+        if isinstance(result, str):
+            r['error'] = result
+        else:
+            length, path, duration, generations, trace, memory = result
+            r['error'] = validate(filename, length, path, duration, maxtime)
+            r['length'] = length
+            r['duration'] = duration
+            r['generations'] = generations
+            r['generations_per_second'] = generations / duration if generations is not None and duration > 0 else None
+            r['memory_kb'] = memory
+            r['trace'] = trace
+        records.append(r)
+
+    summary = summarize(records)
+
+    # Grille de rsultats dans outfile: distance mdiane ou premire erreur rencontre
+
+    outfile.write('Test;')
+    for m in modules:
+        outfile.write("%s;" % m)
+    outfile.write('\n')
+
+    for (filename, maxtime) in tests:
+        filename = os.path.normcase(os.path.normpath(filename))
+        outfile.write("%s (%ds);" % (filename, maxtime))
+        for s in summary:
+            if (s['file'], s['maxtime']) != (filename, maxtime):
+                continue
+            errors = [r['error'] for r in records
+                if (r['module'], r['file'], r['maxtime']) == (s['module'], filename, maxtime) and r['error']]
+            if errors:
+                outfile.write("%s;" % errors[0])
             else:
-                error = validate(filename, length, path, duration, maxtime)
-                if not error:
-                    outfile.write("%d;" % length)
-                else:
-                    outfile.write("%s;" % error)
-            outfile.flush()
-        outfile.write('\n')
\ No newline at end of file
+                outfile.write("%d;" % s['median'])
+        outfile.write('\n')
+    outfile.flush()
+
+    # Mesures dtailles
+
+    if json_file:
+        with open(json_file, 'w') as f:
+            json.dump({'repeats': repeats, 'seed': seed, 'config': config, 'runs': records, 'summary': summary}, f, indent=1)
+
+    if csv_file:
+        columns = ['module', 'file', 'maxtime', 'runs', 'errors', 'mean', 'stdev', 'min', 'median',
+            'generations_per_second', 'memory_kb']
+        columns += ['time_to_%g%%' % (100 * x) for x in reach]
+        with open(csv_file, 'w') as f:
+            f.write(';'.join(columns) + '\n')
+            for s in summary:
+                f.write(';'.join('' if s.get(c) is None else str(s[c]) for c in columns) + '\n')
+
+    # Comparaison avec la rfrence
+
+    if baseline_file and os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        for line in compare(summary, baseline):
+            print(line)
@@ -1,35 +1,142 @@
 # coding: latin-1
 
-"""Un script quick-and-dirty pour gnrer des problmes du voyageur de commerce.
+"""Un script pour gnrer des problmes du voyageur de commerce.
 
-Usage: generate_cities <nombre> <fichier>
+Usage: generate_cities [options] <nombre> <fichier>
 
-Va gnrer <nombre> couple de nombres et le mettre dans <fichier> au format
+Va gnrer <nombre> couples de nombres et les mettre dans <fichier> au format
 v1 x1 y2
 v2 x2 y2
 ...
+ou au format TSPLIB (NODE_COORD_SECTION, EUC_2D) si <fichier> se termine par .tsp
+(ou avec --format tsp), lisible par le Parser du solveur.
+
+Options:
+    --distribution {uniform,clustered,grid,gaussian}
+                            rpartition des villes (dfaut: uniform)
+                            clustered: disques autour de centres alatoires
+                            gaussian: mlange de gaussiennes de poids et d'carts alatoires
+                            grid: grille rgulire couvrant la zone
+    --clusters k            nombre de groupes (clustered, gaussian)
+    --bbox xmin ymin xmax ymax
+                            zone des villes (dfaut: 0 0 500 500)
+    --seed s                graine, pour des problmes reproductibles
+    --format {text,tsp}     format du fichier
+
+Les villes sont gnres et crites par blocs: plusieurs millions de villes
+peuvent tre produites sans tout garder en mmoire.
 
 Attention! script sans garantie! notamment, si <fichier> existe, IL SERA ECRAS!!!
 
 """ 
 
 
+import os
 import sys
-from random import randint
+import math
+import random
+import argparse
+import itertools
 
 MAX_X = MAX_Y = 500
 
+# Nombre de villes gnres et crites en une fois
+CHUNK = 100000
+
+DISTRIBUTIONS = ('uniform', 'clustered', 'grid', 'gaussian')
+FORMATS = ('text', 'tsp')
+
+
+def clamp(v, low, high):
+    return low if v < low else high if v > high else v
+
+def uniform(rng, n, bbox, clusters):
+    '''villes rparties uniformment'''
+    xmin, ymin, xmax, ymax = bbox
+    for i in range(n):
+        yield rng.randint(xmin, xmax), rng.randint(ymin, ymax)
+
+def clustered(rng, n, bbox, clusters):
+    '''villes rparties uniformment dans des disques autour de centres alatoires'''
+    xmin, ymin, xmax, ymax = bbox
+    radius = 0.1 * min(xmax - xmin, ymax - ymin)
+    centers = [(rng.uniform(xmin, xmax), rng.uniform(ymin, ymax)) for k in range(clusters)]
+    for i in range(n):
+        cx, cy = rng.choice(centers)
+        r = radius * math.sqrt(rng.random())
+        a = rng.uniform(0, 2 * math.pi)
+        yield clamp(round(cx + r * math.cos(a)), xmin, xmax), clamp(round(cy + r * math.sin(a)), ymin, ymax)
+
+def gaussian(rng, n, bbox, clusters):
+    '''mlange de gaussiennes: centres, carts types et poids alatoires'''
+    xmin, ymin, xmax, ymax = bbox
+    size = min(xmax - xmin, ymax - ymin)
+    centers = [(rng.uniform(xmin, xmax), rng.uniform(ymin, ymax), rng.uniform(0.02, 0.1) * size) for k in range(clusters)]
+    weights = list(itertools.accumulate(rng.random() for k in range(clusters)))
+    for i in range(n):
+        cx, cy, sigma = rng.choices(centers, cum_weights=weights)[0]
+        yield clamp(round(rng.gauss(cx, sigma)), xmin, xmax), clamp(round(rng.gauss(cy, sigma)), ymin, ymax)
+
+def grid(rng, n, bbox, clusters):
+    '''grille rgulire couvrant la zone, remplie ligne par ligne'''
+    xmin, ymin, xmax, ymax = bbox
+    columns = max(1, math.ceil(math.sqrt(n)))
+    rows = max(1, math.ceil(n / columns))
+    dx = (xmax - xmin) / max(1, columns - 1)
+    dy = (ymax - ymin) / max(1, rows - 1)
+    for i in range(n):
+        yield round(xmin + (i % columns) * dx), round(ymin + (i // columns) * dy)
+
+def chunks(points, size):
+    '''dcoupe le flux de villes en listes de size villes'''
+    chunk = []
+    for p in points:
+        chunk.append(p)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def write_text(f, points, n, name):
+    start = 0
+    for chunk in chunks(points, CHUNK):
+        f.write(''.join("v%d %d %d\n" % (start + i, x, y) for i, (x, y) in enumerate(chunk)))
+        start += len(chunk)
+
+def write_tsp(f, points, n, name):
+    f.write("NAME : %s\nCOMMENT : %d villes, generate_cities.py\nTYPE : TSP\nDIMENSION : %d\n"
+            "EDGE_WEIGHT_TYPE : EUC_2D\nNODE_COORD_SECTION\n" % (name, n, n))
+    start = 1
+    for chunk in chunks(points, CHUNK):
+        f.write(''.join("%d %d %d\n" % (start + i, x, y) for i, (x, y) in enumerate(chunk)))
+        start += len(chunk)
+    f.write("EOF\n")
+
+
+parser = argparse.ArgumentParser(usage=argparse.SUPPRESS, add_help=False)
+parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='uniform')
+parser.add_argument('--clusters', type=int, default=8)
+parser.add_argument('--bbox', type=int, nargs=4, default=(0, 0, MAX_X, MAX_Y))
+parser.add_argument('--seed', type=int, default=None)
+parser.add_argument('--format', choices=FORMATS, default=None)
+parser.add_argument('nb', type=int)
+parser.add_argument('filename')
+
 try:
-    filename = sys.argv[2]
-    nb = int(sys.argv[1])
-except:
+    args = parser.parse_args()
+except SystemExit:
     print (__doc__)
     sys.exit(1)
 
-f = open(filename, "w")
+if args.format is None:
+    args.format = 'tsp' if args.filename.endswith('.tsp') else 'text'
 
-for i in range(nb):
-    line = "v%d %d %d\n" % (i, randint(0,MAX_X), randint(0,MAX_Y))
-    f.write(line)
+rng = random.Random(args.seed)
+generators = {'uniform': uniform, 'clustered': clustered, 'grid': grid, 'gaussian': gaussian}
+points = generators[args.distribution](rng, args.nb, args.bbox, max(1, args.clusters))
+write = write_tsp if args.format == 'tsp' else write_text
+name = os.path.splitext(os.path.basename(args.filename))[0]
 
-f.close()
\ No newline at end of file
+with open(args.filename, "w") as f:
+    write(f, points, args.nb, name)